@@ -0,0 +1,76 @@
+import xml.etree.ElementTree as ET
+from typing import Dict, Iterable, Iterator, List, Union
+
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+ARXIV = "{http://arxiv.org/schemas/atom}"
+
+
+def _text(element: ET.Element, tag: str) -> str:
+    value = element.findtext(tag)
+    return value.strip() if value else ""
+
+
+def _entry_to_paper(entry: ET.Element) -> Dict:
+    title = " ".join(_text(entry, f"{ATOM}title").split())
+    summary = _text(entry, f"{ATOM}summary")
+    if not title or not summary:
+        return {}
+
+    pdf_url = ""
+    for link in entry.iter(f"{ATOM}link"):
+        if link.get("title") == "pdf" or link.get("type") == "application/pdf":
+            pdf_url = link.get("href", "")
+            break
+
+    primary = entry.find(f"{ARXIV}primary_category")
+    categories = [c.get("term", "") for c in entry.iter(f"{ATOM}category") if c.get("term")]
+    if primary is not None and primary.get("term") in categories:
+        categories.remove(primary.get("term"))
+        categories.insert(0, primary.get("term"))
+
+    return {
+        "source": "arxiv",
+        "title": title,
+        "url": _text(entry, f"{ATOM}id"),
+        "published": _text(entry, f"{ATOM}published")[:10],
+        "updated": _text(entry, f"{ATOM}updated")[:10],
+        "abstract": summary,
+        "authors": [_text(author, f"{ATOM}name") for author in entry.iter(f"{ATOM}author")],
+        "categories": categories,
+        "pdf_url": pdf_url
+    }
+
+
+def iter_arxiv_entries(chunks: Iterable[Union[bytes, str]]) -> Iterator[Dict]:
+    parser = ET.XMLPullParser(events=("start", "end"))
+    root = None
+
+    def drain() -> Iterator[Dict]:
+        nonlocal root
+        for event, element in parser.read_events():
+            if event == "start":
+                if root is None:
+                    root = element
+                continue
+            if element.tag != f"{ATOM}entry":
+                continue
+
+            paper = _entry_to_paper(element)
+            # Detach every finished <entry> from the feed root, so memory
+            # stays flat however many results arrive.
+            root.clear()
+            if paper:
+                yield paper
+
+    for chunk in chunks:
+        if chunk:
+            parser.feed(chunk)
+            yield from drain()
+
+    parser.close()
+    yield from drain()
+
+
+def parse_arxiv_feed(xml: Union[bytes, str]) -> List[Dict]:
+    return list(iter_arxiv_entries([xml]))
@@ -0,0 +1,268 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict, defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+DEFAULT_CACHE_DIR = Path(os.getenv("RESEARCH_CACHE_DIR", Path(__file__).parent.parent / ".cache"))
+
+
+def hash_key(*parts: Any) -> str:
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SQLiteCache:
+    def __init__(self, path: Path, max_bytes: int = 64 * 1024 * 1024):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, namespace TEXT NOT NULL, value TEXT NOT NULL, "
+            "size INTEGER NOT NULL, expires_at REAL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries (accessed_at)")
+        self._conn.commit()
+
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        self._hits: Dict[str, int] = defaultdict(int)
+        self._misses: Dict[str, int] = defaultdict(int)
+
+    def get(self, key: str, namespace: str = "default") -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None or (row[1] is not None and row[1] <= now):
+                self._misses[namespace] += 1
+                return None
+
+            self._conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self._hits[namespace] += 1
+
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, namespace: str = "default"):
+        payload = json.dumps(value, ensure_ascii=False)
+        size = len(payload.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+
+        now = time.time()
+        expires_at = now + ttl if ttl is not None else None
+
+        with self._lock:
+            previous = self._conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, namespace, value, size, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, namespace, payload, size, expires_at, now)
+            )
+            self._total_bytes += size - (previous[0] if previous else 0)
+
+            if self._total_bytes > self.max_bytes:
+                self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float):
+        # Other processes may share the file, so resync before trimming.
+        self._conn.execute("DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+        # Trim least recently used entries down to 90% to avoid evicting on every write.
+        target = int(self.max_bytes * 0.9)
+        if self._total_bytes <= target:
+            return
+
+        cursor = self._conn.execute("SELECT key, size FROM entries ORDER BY accessed_at ASC")
+        stale_keys = []
+        for key, size in cursor:
+            if self._total_bytes <= target:
+                break
+            stale_keys.append((key,))
+            self._total_bytes -= size
+
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", stale_keys)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            hits = dict(self._hits)
+            misses = dict(self._misses)
+
+        total_hits = sum(hits.values())
+        total_lookups = total_hits + sum(misses.values())
+        return {
+            "entries": entries,
+            "bytes": self._total_bytes,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": total_hits / total_lookups if total_lookups else 0.0
+        }
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+            self._total_bytes = 0
+
+
+DEFAULT_SOURCE_TTLS = {
+    "wikipedia": 7 * 24 * 3600,
+    "arxiv": 24 * 3600,
+}
+
+
+class RetrievalCache(SQLiteCache):
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        ttls: Optional[Dict[str, float]] = None,
+        negative_ttl: float = 3600,
+        max_bytes: int = 64 * 1024 * 1024
+    ):
+        super().__init__(path or DEFAULT_CACHE_DIR / "retrieval.sqlite3", max_bytes=max_bytes)
+        self.ttls = dict(DEFAULT_SOURCE_TTLS if ttls is None else ttls)
+        self.negative_ttl = negative_ttl
+
+    @staticmethod
+    def normalize_keyword(keyword: str) -> str:
+        return " ".join(keyword.lower().split())
+
+    def _key(self, source: str, keyword: str, params: Dict) -> str:
+        return hash_key(source, self.normalize_keyword(keyword), params)
+
+    @staticmethod
+    def _is_empty(value: Any) -> bool:
+        if isinstance(value, dict):
+            return not value.get("title")
+        return not value
+
+    def lookup(self, source: str, keyword: str, params: Dict) -> Optional[Any]:
+        return self.get(self._key(source, keyword, params), namespace=source)
+
+    def store(self, source: str, keyword: str, params: Dict, value: Any):
+        # Empty results are cached too, but only briefly, so a keyword that
+        # matched nothing is not re-queried on every job yet can recover.
+        ttl = self.negative_ttl if self._is_empty(value) else self.ttls.get(source)
+        self.set(self._key(source, keyword, params), value, ttl=ttl, namespace=source)
+
+
+class SummaryCache(SQLiteCache):
+    # Summaries are pure functions of their key, so entries never expire;
+    # the persistent tier is bounded by size and a small LRU sits in front.
+    namespace = "summary"
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        max_bytes: int = 32 * 1024 * 1024,
+        memory_entries: int = 512
+    ):
+        super().__init__(path or DEFAULT_CACHE_DIR / "summaries.sqlite3", max_bytes=max_bytes)
+        self.memory_entries = memory_entries
+        self._memory: "OrderedDict[str, Any]" = OrderedDict()
+        self._memory_lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model_name: str, prompt_hash: str, source_type: str, title: str, content: str) -> str:
+        content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        return hash_key(model_name, prompt_hash, source_type, title, content_hash)
+
+    def _remember(self, key: str, value: Any):
+        with self._memory_lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def lookup(self, key: str) -> Optional[Any]:
+        with self._memory_lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                value = self._memory[key]
+            else:
+                value = None
+        if value is not None:
+            with self._lock:
+                self._hits["memory"] += 1
+            return value
+
+        value = self.get(key, namespace=self.namespace)
+        if value is not None:
+            self._remember(key, value)
+        return value
+
+    def store(self, key: str, value: Any):
+        self._remember(key, value)
+        self.set(key, value, namespace=self.namespace)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        with self._memory_lock:
+            stats["memory_entries"] = len(self._memory)
+        return stats
+
+    def clear(self):
+        with self._memory_lock:
+            self._memory.clear()
+        super().clear()
+
+
+class SynthesisCache(SQLiteCache):
+    # Reports are LLM-sampled rather than pure, so entries expire and a
+    # repeated topic eventually gets a fresh report.
+    namespace = "synthesis"
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        ttl: Optional[float] = 7 * 24 * 3600,
+        max_bytes: int = 32 * 1024 * 1024
+    ):
+        super().__init__(path or DEFAULT_CACHE_DIR / "syntheses.sqlite3", max_bytes=max_bytes)
+        self.ttl = ttl
+
+    @staticmethod
+    def normalize_topic(topic: str) -> str:
+        return " ".join(topic.lower().split())
+
+    @staticmethod
+    def summaries_fingerprint(summaries: List[Dict]) -> str:
+        # Only the fields that reach the prompt; URLs, methods and
+        # near-duplicate lists do not change the report.
+        canonical = [
+            [
+                item['keyword'],
+                [[s['source_type'], s['title'], list(s['key_points'])] for s in item['summaries']]
+            ]
+            for item in summaries
+        ]
+        return hash_key(canonical)
+
+    @classmethod
+    def make_key(cls, model_name: str, prompt_hash: str, mode: str, topic: str,
+                 summaries: List[Dict], params: Optional[Dict] = None) -> str:
+        return hash_key(
+            model_name, prompt_hash, mode, cls.normalize_topic(topic),
+            cls.summaries_fingerprint(summaries), params or {}
+        )
+
+    def lookup(self, key: str) -> Optional[Dict[str, str]]:
+        return self.get(key, namespace=self.namespace)
+
+    def store(self, key: str, synthesis: Dict[str, str]):
+        self.set(key, synthesis, ttl=self.ttl, namespace=self.namespace)
@@ -0,0 +1,126 @@
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .tokens import content_words, estimate_tokens
+
+
+PLACEHOLDER_PREFIXES = ("no content available to summarize", "error during summarization")
+
+# Approximate prompt cost of one bullet ("  - ...\n") and of a source header.
+POINT_OVERHEAD_TOKENS = 2
+
+
+def is_placeholder(point: str) -> bool:
+    return point.strip().lower().startswith(PLACEHOLDER_PREFIXES)
+
+
+def hashed_vectors(texts: List[str], dim: int = 4096) -> np.ndarray:
+    # Hashing trick: unigrams and bigrams bucketed into a fixed-width,
+    # sublinear-tf, L2-normalised vector. No vocabulary to build or store.
+    rows, cols = [], []
+    for i, text in enumerate(texts):
+        words = content_words(text)
+        features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        for feature in features:
+            rows.append(i)
+            cols.append(zlib.crc32(feature.encode("utf-8")) % dim)
+
+    counts = np.zeros((len(texts), dim))
+    np.add.at(counts, (np.array(rows, dtype=np.intp), np.array(cols, dtype=np.intp)), 1.0)
+    vectors = np.log1p(counts)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+def _source_header(summary: Dict) -> str:
+    return f"Source ({summary['source_type']}): {summary['title']}\nKey Points:"
+
+
+def compress_summaries(
+    summaries: List[Dict],
+    topic: str,
+    token_budget: Optional[int] = None,
+    topic_weight: float = 0.7
+) -> List[Dict]:
+    # Drops placeholder and error points (and sources left with nothing),
+    # then, if a budget is given, keeps the points most similar to the
+    # topic and their research area until the budget is spent.
+    candidates: List[Tuple[int, int, int, str]] = []
+    kept: List[Dict] = []
+    for item in summaries:
+        kept_item = {"keyword": item['keyword'], "summaries": []}
+        for summary in item['summaries']:
+            points = [point for point in summary.get('key_points', []) if point and not is_placeholder(point)]
+            if not points:
+                continue
+            kept_item['summaries'].append({**summary, "key_points": points})
+            for position, point in enumerate(points):
+                candidates.append((len(kept), len(kept_item['summaries']) - 1, position, point))
+        if kept_item['summaries']:
+            kept.append(kept_item)
+
+    if token_budget is None or not candidates:
+        return kept
+
+    total = sum(estimate_tokens(point) + POINT_OVERHEAD_TOKENS for _, _, _, point in candidates)
+    total += sum(estimate_tokens(_source_header(s)) for item in kept for s in item['summaries'])
+    if total <= token_budget:
+        return kept
+
+    keywords = [item['keyword'] for item in kept]
+    vectors = hashed_vectors([point for _, _, _, point in candidates] + [topic] + keywords)
+    point_vectors = vectors[:len(candidates)]
+    topic_vector = vectors[len(candidates)]
+    keyword_vectors = vectors[len(candidates) + 1:]
+
+    item_index = np.array([c[0] for c in candidates])
+    positions = np.array([c[2] for c in candidates])
+    scores = (
+        topic_weight * (point_vectors @ topic_vector)
+        + (1 - topic_weight) * np.einsum("ij,ij->i", point_vectors, keyword_vectors[item_index])
+        # Summarizers put the most important point first; break ties that way.
+        + 0.05 / (1 + positions)
+    )
+
+    # Each source's best point goes in first so no source vanishes while
+    # the budget allows; the rest are filled in by score.
+    order = np.argsort(-scores, kind="stable")
+    first_pass, second_pass, seen_sources = [], [], set()
+    for i in order:
+        source = candidates[i][:2]
+        (second_pass if source in seen_sources else first_pass).append(i)
+        seen_sources.add(source)
+
+    selected = set()
+    used = 0
+    sources_used = set()
+    for i in first_pass + second_pass:
+        item_i, summary_i, _, point = candidates[i]
+        cost = estimate_tokens(point) + POINT_OVERHEAD_TOKENS
+        if (item_i, summary_i) not in sources_used:
+            cost += estimate_tokens(_source_header(kept[item_i]['summaries'][summary_i]))
+        if used + cost > token_budget:
+            continue
+        used += cost
+        selected.add(i)
+        sources_used.add((item_i, summary_i))
+
+    # Candidates are in document order, so this keeps each source's points
+    # in the order the summarizer wrote them.
+    selected_points: Dict[Tuple[int, int], List[str]] = {}
+    for i, (item_i, summary_i, _, point) in enumerate(candidates):
+        if i in selected:
+            selected_points.setdefault((item_i, summary_i), []).append(point)
+
+    compressed = []
+    for item_i, item in enumerate(kept):
+        compressed_item = {"keyword": item['keyword'], "summaries": []}
+        for summary_i, summary in enumerate(item['summaries']):
+            points = selected_points.get((item_i, summary_i))
+            if points:
+                compressed_item['summaries'].append({**summary, "key_points": points})
+        if compressed_item['summaries']:
+            compressed.append(compressed_item)
+    return compressed
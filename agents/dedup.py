@@ -0,0 +1,98 @@
+import re
+import zlib
+from collections import defaultdict
+from typing import Dict, List, Optional
+from urllib.parse import unquote, urlparse
+
+import numpy as np
+
+
+ARXIV_ID_PATTERN = re.compile(r"arxiv\.org/(?:abs|pdf)/(.+?)(?:v\d+)?(?:\.pdf)?/?$")
+
+
+def _normalize_title(title: str) -> str:
+    return " ".join(title.lower().split())
+
+
+def canonical_source_key(source_type: str, title: str, url: str = "") -> str:
+    # arXiv papers are identified by their version-less ID, Wikipedia
+    # articles by page title, so the same source retrieved for several
+    # keywords maps to a single key.
+    if source_type == "arxiv" and url:
+        match = ARXIV_ID_PATTERN.search(urlparse(url).netloc + urlparse(url).path)
+        if match:
+            return f"arxiv:{match.group(1)}"
+
+    if source_type == "wikipedia" and url:
+        path = urlparse(url).path
+        if path.startswith("/wiki/"):
+            return f"wikipedia:{_normalize_title(unquote(path[len('/wiki/'):]).replace('_', ' '))}"
+
+    return f"{source_type}:title:{_normalize_title(title)}"
+
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def _shingle_hashes(text: str, shingle_size: int) -> np.ndarray:
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) < shingle_size:
+        shingles = [" ".join(words)] if words else []
+    else:
+        shingles = [" ".join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)]
+    return np.unique(np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles)))
+
+
+class NearDuplicateIndex:
+    # MinHash signatures bucketed by LSH bands. Items are added one at a
+    # time, so it works on a stream of sources as well as on a full list.
+    def __init__(self, threshold: float = 0.8, num_perm: int = 128, bands: int = 16,
+                 shingle_size: int = 5, min_words: int = 20, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.min_words = min_words
+
+        rng = np.random.default_rng(seed)
+        # Universal hashing (a*x + b) mod p with 32-bit inputs; the products
+        # stay below 2^64 because a and b are drawn under 2^32.
+        self._a = rng.integers(1, MAX_HASH, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, MAX_HASH, size=num_perm, dtype=np.uint64)
+        self._buckets: List[Dict[bytes, List[str]]] = [defaultdict(list) for _ in range(bands)]
+        self._signatures: Dict[str, np.ndarray] = {}
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        if len(WORD_PATTERN.findall(text)) < self.min_words:
+            return None
+        hashes = _shingle_hashes(text, self.shingle_size)
+        # One (num_perm x shingles) matrix, reduced with a single min.
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % MERSENNE_PRIME
+        return permuted.min(axis=1)
+
+    def add(self, key: str, text: str) -> Optional[str]:
+        # Returns the key of an earlier near-duplicate, or None after
+        # indexing the item as a new representative.
+        signature = self.signature(text)
+        if signature is None:
+            return None
+
+        band_keys = [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+        best_key, best_similarity = None, 0.0
+        for band, band_key in zip(self._buckets, band_keys):
+            for candidate in band.get(band_key, []):
+                similarity = float(np.mean(self._signatures[candidate] == signature))
+                if similarity > best_similarity:
+                    best_key, best_similarity = candidate, similarity
+        if best_key is not None and best_similarity >= self.threshold:
+            return best_key
+
+        self._signatures[key] = signature
+        for band, band_key in zip(self._buckets, band_keys):
+            band[band_key].append(key)
+        return None
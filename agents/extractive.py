@@ -0,0 +1,68 @@
+from typing import Dict, List
+
+import numpy as np
+
+from .tokens import SENTENCE_PATTERN, content_words
+
+
+def split_sentences(text: str) -> List[str]:
+    sentences = []
+    for paragraph in text.split("\n"):
+        for sentence in SENTENCE_PATTERN.split(paragraph.strip()):
+            sentence = " ".join(sentence.split())
+            # Fragments (headings, stray citations) make poor key points.
+            if len(sentence.split()) >= 5:
+                sentences.append(sentence)
+    return sentences
+
+
+def _tfidf_matrix(sentences: List[str]) -> np.ndarray:
+    vocabulary: Dict[str, int] = {}
+    rows, cols = [], []
+    for i, sentence in enumerate(sentences):
+        for word in content_words(sentence):
+            rows.append(i)
+            cols.append(vocabulary.setdefault(word, len(vocabulary)))
+
+    counts = np.zeros((len(sentences), max(1, len(vocabulary))))
+    np.add.at(counts, (np.array(rows, dtype=np.intp), np.array(cols, dtype=np.intp)), 1.0)
+
+    document_frequency = np.count_nonzero(counts, axis=0)
+    idf = np.log((1 + len(sentences)) / (1 + document_frequency)) + 1.0
+    tfidf = counts * idf
+    norms = np.linalg.norm(tfidf, axis=1, keepdims=True)
+    return tfidf / np.where(norms == 0, 1.0, norms)
+
+
+def rank_sentences(sentences: List[str], damping: float = 0.85, iterations: int = 50) -> np.ndarray:
+    # TextRank: PageRank over the cosine-similarity graph of sentences.
+    vectors = _tfidf_matrix(sentences)
+    similarity = vectors @ vectors.T
+    np.fill_diagonal(similarity, 0.0)
+
+    out_weight = similarity.sum(axis=1, keepdims=True)
+    transition = np.divide(similarity, out_weight, out=np.zeros_like(similarity), where=out_weight > 0)
+
+    n = len(sentences)
+    scores = np.full(n, 1.0 / n)
+    for _ in range(iterations):
+        updated = (1 - damping) / n + damping * (transition.T @ scores)
+        if np.abs(updated - scores).sum() < 1e-6:
+            scores = updated
+            break
+        scores = updated
+    return scores
+
+
+def extract_key_points(text: str, count: int = 6) -> List[str]:
+    sentences = split_sentences(text)
+    if not sentences:
+        # Nothing long enough to rank; keep whatever text there is.
+        sentences = [sentence for sentence in SENTENCE_PATTERN.split(" ".join(text.split())) if sentence]
+    if len(sentences) <= count:
+        return sentences
+
+    scores = rank_sentences(sentences)
+    # Highest-ranked sentences, presented in their original order.
+    top = np.sort(np.argsort(-scores, kind="stable")[:count])
+    return [sentences[i] for i in top]
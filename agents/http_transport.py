@@ -0,0 +1,175 @@
+import time
+import random
+import threading
+import requests
+from collections import defaultdict
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+
+
+# Minimum spacing between requests to the same host. Requests to different
+# hosts are never serialized.
+DEFAULT_HOST_INTERVALS = {
+    "en.wikipedia.org": 0.1,
+    # arXiv API terms: no more than one request every three seconds.
+    "export.arxiv.org": 3.0,
+}
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    # Retry-After is either delta-seconds or an HTTP date.
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def full_jitter(attempt: int, base: float, cap: float) -> float:
+    # Uniform over [0, base * 2^attempt], capped.
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class HostPacer:
+    def __init__(self, intervals: Optional[Dict[str, float]] = None, default_interval: float = 0.0):
+        self.intervals = dict(DEFAULT_HOST_INTERVALS if intervals is None else intervals)
+        self.default_interval = default_interval
+        self._next_slot: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url: str):
+        host = urlparse(url).netloc
+        interval = self.intervals.get(host, self.default_interval)
+        if interval <= 0:
+            return
+
+        # Reserve the next free slot under the lock, sleep outside it so
+        # waiting on one host never blocks callers targeting another.
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, 0.0))
+            self._next_slot[host] = slot + interval
+
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+    def defer(self, url: str, delay: float):
+        host = urlparse(url).netloc
+        with self._lock:
+            resume_at = time.monotonic() + delay
+            self._next_slot[host] = max(self._next_slot.get(host, 0.0), resume_at)
+
+
+class HttpTransport:
+    def __init__(
+        self,
+        headers: Optional[Dict[str, str]] = None,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 15.0,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        pool_maxsize: int = 10,
+        pacer: Optional[HostPacer] = None
+    ):
+        self.timeout: Tuple[float, float] = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.pacer = pacer or HostPacer()
+
+        # One keep-alive pool per host; pool_maxsize bounds the sockets kept
+        # open per host and should cover the retriever's worker count.
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if headers:
+            self.session.headers.update(headers)
+
+        self._counters: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"requests": 0, "retries": 0, "failures": 0}
+        )
+        self._lock = threading.Lock()
+
+    def _count(self, host: str, counter: str):
+        with self._lock:
+            self._counters[host][counter] += 1
+
+    def _retry_after(self, response: requests.Response) -> Optional[float]:
+        return parse_retry_after(response.headers.get("Retry-After"))
+
+    def _backoff(self, attempt: int) -> float:
+        return full_jitter(attempt, self.backoff_base, self.backoff_max)
+
+    def get(self, url: str, params: Optional[Dict] = None, stream: bool = False, **kwargs) -> requests.Response:
+        host = urlparse(url).hostname or ""
+        kwargs.setdefault("timeout", self.timeout)
+        attempt = 0
+
+        while True:
+            self.pacer.wait(url)
+            self._count(host, "requests")
+
+            try:
+                response = self.session.get(url, params=params, stream=stream, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries:
+                    self._count(host, "failures")
+                    raise
+                delay = self._backoff(attempt)
+            else:
+                if response.status_code not in RETRYABLE_STATUS_CODES or attempt >= self.max_retries:
+                    if not response.ok:
+                        self._count(host, "failures")
+                    return response
+
+                retry_after = self._retry_after(response)
+                delay = min(self.backoff_max, retry_after) if retry_after is not None else self._backoff(attempt)
+                response.close()
+
+                # Push back every other caller targeting this host too, so
+                # parallel workers do not keep hammering a throttled API.
+                if response.status_code == 429:
+                    self.pacer.defer(url, delay)
+
+            self._count(host, "retries")
+            attempt += 1
+            time.sleep(delay)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            stats = {host: dict(counters) for host, counters in self._counters.items()}
+
+        for adapter in set(self.session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                host_stats = stats.setdefault(pool.host, {"requests": 0, "retries": 0, "failures": 0})
+                host_stats["new_connections"] = host_stats.get("new_connections", 0) + pool.num_connections
+                host_stats["reused_connections"] = (
+                    host_stats.get("reused_connections", 0) + max(0, pool.num_requests - pool.num_connections)
+                )
+
+        return stats
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,307 @@
+import re
+import json
+import time
+import shutil
+import argparse
+import numpy as np
+from pathlib import Path
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+from collections import Counter
+from numpy.lib.format import open_memmap
+
+
+MAX_TERM_LEN = 24
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "in", "is",
+    "it", "its", "of", "on", "or", "that", "the", "this", "to", "was", "we", "were", "which",
+    "with", "our", "these", "their", "can", "also", "than", "such", "into", "via"
+}
+
+
+def tokenize(text: str) -> List[str]:
+    return [
+        token[:MAX_TERM_LEN] for token in TOKEN_PATTERN.findall(text.lower())
+        if len(token) > 1 and token not in STOPWORDS
+    ]
+
+
+def _record_to_paper(record: Dict) -> Dict:
+    # Converts one line of the public arXiv metadata dump into the same
+    # paper dict the live API path produces.
+    arxiv_id = record["id"]
+    versions = record.get("versions") or []
+    latest = versions[-1]["version"] if versions else ""
+
+    published = ""
+    if versions and versions[0].get("created"):
+        try:
+            published = parsedate_to_datetime(versions[0]["created"]).date().isoformat()
+        except (TypeError, ValueError):
+            published = ""
+
+    if record.get("authors_parsed"):
+        authors = [
+            " ".join(part for part in (parts[1], parts[0]) if part).strip()
+            for parts in record["authors_parsed"]
+        ]
+    else:
+        authors = [name.strip() for name in (record.get("authors") or "").split(",") if name.strip()]
+
+    return {
+        "source": "arxiv",
+        "title": " ".join((record.get("title") or "").split()),
+        "url": f"http://arxiv.org/abs/{arxiv_id}{latest}",
+        "published": published,
+        "updated": record.get("update_date") or published,
+        "abstract": (record.get("abstract") or "").strip(),
+        "authors": authors,
+        "categories": (record.get("categories") or "").split(),
+        "pdf_url": f"http://arxiv.org/pdf/{arxiv_id}{latest}"
+    }
+
+
+def _iter_records(jsonl_path: Path) -> Iterator[Dict]:
+    with open(jsonl_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def _flush_block(block_dir: Path, block_index: int, term_ids: List[int], doc_ids: List[int], tfs: List[int]) -> Path:
+    path = block_dir / f"block_{block_index:05d}.npz"
+    np.savez(
+        path,
+        terms=np.asarray(term_ids, dtype=np.uint32),
+        docs=np.asarray(doc_ids, dtype=np.uint32),
+        tfs=np.minimum(np.asarray(tfs, dtype=np.uint32), np.iinfo(np.uint16).max).astype(np.uint16)
+    )
+    return path
+
+
+def build_index(jsonl_path: str, index_dir: str, block_docs: int = 100000, limit: Optional[int] = None) -> Dict:
+    jsonl_path = Path(jsonl_path)
+    index_dir = Path(index_dir)
+    index_dir.mkdir(parents=True, exist_ok=True)
+    block_dir = index_dir / "blocks"
+    block_dir.mkdir(exist_ok=True)
+
+    start_time = time.time()
+    vocab: Dict[str, int] = {}
+    doc_lengths: List[int] = []
+    doc_offsets: List[int] = [0]
+    blocks: List[Path] = []
+    term_ids: List[int] = []
+    doc_ids: List[int] = []
+    tfs: List[int] = []
+
+    # Pass 1: stream the dump once, writing paper dicts as we go and
+    # spilling (term, doc, tf) triples to disk every block_docs documents.
+    with open(index_dir / "docs.jsonl", "wb") as docs_file:
+        for record in _iter_records(jsonl_path):
+            if limit is not None and len(doc_lengths) >= limit:
+                break
+            if not record.get("id") or not record.get("title"):
+                continue
+
+            paper = _record_to_paper(record)
+            counts = Counter(tokenize(f"{paper['title']} {paper['abstract']}"))
+            doc_id = len(doc_lengths)
+
+            for term, tf in counts.items():
+                term_ids.append(vocab.setdefault(term, len(vocab)))
+                doc_ids.append(doc_id)
+                tfs.append(tf)
+            doc_lengths.append(sum(counts.values()))
+
+            docs_file.write(json.dumps(paper, ensure_ascii=False).encode("utf-8") + b"\n")
+            doc_offsets.append(docs_file.tell())
+
+            if len(doc_lengths) % block_docs == 0:
+                blocks.append(_flush_block(block_dir, len(blocks), term_ids, doc_ids, tfs))
+                term_ids, doc_ids, tfs = [], [], []
+
+    if term_ids:
+        blocks.append(_flush_block(block_dir, len(blocks), term_ids, doc_ids, tfs))
+
+    # Term ids were assigned in first-seen order; remap them so the on-disk
+    # vocabulary is sorted and can be binary-searched straight from mmap.
+    sorted_terms = sorted(vocab)
+    remap = np.empty(len(vocab), dtype=np.uint32)
+    remap[np.fromiter((vocab[t] for t in sorted_terms), dtype=np.int64, count=len(vocab))] = np.arange(len(vocab), dtype=np.uint32)
+    np.save(index_dir / "terms.npy", np.array(sorted_terms, dtype=f"S{MAX_TERM_LEN}"))
+    del vocab
+
+    document_freq = np.zeros(len(sorted_terms), dtype=np.int64)
+    for block in blocks:
+        with np.load(block) as data:
+            document_freq += np.bincount(remap[data["terms"]], minlength=len(sorted_terms))
+
+    term_offsets = np.zeros(len(sorted_terms) + 1, dtype=np.int64)
+    np.cumsum(document_freq, out=term_offsets[1:])
+    total_postings = int(term_offsets[-1])
+
+    # Pass 2: scatter each block into its terms' slices. Blocks are visited
+    # in doc order and sorted stably, so every posting list stays doc-sorted.
+    postings_docs = open_memmap(index_dir / "postings_docs.npy", mode="w+", dtype=np.uint32, shape=(total_postings,))
+    postings_tfs = open_memmap(index_dir / "postings_tfs.npy", mode="w+", dtype=np.uint16, shape=(total_postings,))
+    cursor = term_offsets[:-1].copy()
+
+    for block in blocks:
+        with np.load(block) as data:
+            terms = remap[data["terms"]]
+            order = np.argsort(terms, kind="stable")
+            terms = terms[order]
+            unique_terms, first_index, counts = np.unique(terms, return_index=True, return_counts=True)
+            rank = np.arange(len(terms)) - np.repeat(first_index, counts)
+            positions = cursor[terms] + rank
+            postings_docs[positions] = data["docs"][order]
+            postings_tfs[positions] = data["tfs"][order]
+            cursor[unique_terms] += counts
+
+    postings_docs.flush()
+    postings_tfs.flush()
+    del postings_docs, postings_tfs
+    shutil.rmtree(block_dir, ignore_errors=True)
+
+    lengths = np.asarray(doc_lengths, dtype=np.uint32)
+    np.save(index_dir / "term_offsets.npy", term_offsets)
+    np.save(index_dir / "doc_lengths.npy", lengths)
+    np.save(index_dir / "doc_offsets.npy", np.asarray(doc_offsets, dtype=np.int64))
+
+    elapsed = time.time() - start_time
+    stats = {
+        "documents": len(doc_lengths),
+        "terms": len(sorted_terms),
+        "postings": total_postings,
+        "avg_doc_length": float(lengths.mean()) if len(lengths) else 0.0,
+        "seconds": elapsed,
+        "docs_per_second": len(doc_lengths) / elapsed if elapsed > 0 else 0.0,
+        "source": str(jsonl_path),
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+    }
+    (index_dir / "meta.json").write_text(json.dumps(stats, indent=2))
+
+    return stats
+
+
+class LocalArxivIndex:
+
+    def __init__(self, index_dir: str, k1: float = 1.2, b: float = 0.75):
+        self.index_dir = Path(index_dir)
+        if not (self.index_dir / "meta.json").exists():
+            raise FileNotFoundError(
+                f"No local arXiv index found at {self.index_dir}\n"
+                f"Build one with: python -m agents.local_arxiv build <metadata.jsonl> {self.index_dir}"
+            )
+
+        self.k1 = k1
+        self.b = b
+        self.meta = json.loads((self.index_dir / "meta.json").read_text())
+
+        self.terms = np.load(self.index_dir / "terms.npy", mmap_mode="r")
+        self.term_offsets = np.load(self.index_dir / "term_offsets.npy", mmap_mode="r")
+        self.postings_docs = np.load(self.index_dir / "postings_docs.npy", mmap_mode="r")
+        self.postings_tfs = np.load(self.index_dir / "postings_tfs.npy", mmap_mode="r")
+        self.doc_lengths = np.load(self.index_dir / "doc_lengths.npy", mmap_mode="r")
+        self.doc_offsets = np.load(self.index_dir / "doc_offsets.npy", mmap_mode="r")
+
+        self.num_docs = len(self.doc_lengths)
+        self.avg_doc_length = max(self.meta.get("avg_doc_length", 0.0), 1e-9)
+
+    def _term_id(self, term: str) -> Optional[int]:
+        key = term.encode("utf-8")[:MAX_TERM_LEN]
+        position = int(np.searchsorted(self.terms, key))
+        if position < len(self.terms) and self.terms[position] == key:
+            return position
+        return None
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[int, float]]:
+        term_ids = {tid for tid in map(self._term_id, set(tokenize(query))) if tid is not None}
+        if not term_ids or self.num_docs == 0:
+            return []
+
+        postings = []
+        for tid in term_ids:
+            start, end = int(self.term_offsets[tid]), int(self.term_offsets[tid + 1])
+            docs = np.asarray(self.postings_docs[start:end])
+            tf = self.postings_tfs[start:end].astype(np.float32)
+            df = end - start
+
+            idf = np.log1p((self.num_docs - df + 0.5) / (df + 0.5))
+            norm = self.k1 * (1.0 - self.b + self.b * self.doc_lengths[docs] / self.avg_doc_length)
+            postings.append((docs, idf * tf * (self.k1 + 1.0) / (tf + norm)))
+
+        total_postings = sum(len(docs) for docs, _ in postings)
+        if total_postings * 8 >= self.num_docs:
+            # Common terms: a dense accumulator avoids sorting millions of
+            # ids. Each posting list holds a doc at most once, so plain
+            # fancy-index addition is safe.
+            totals = np.zeros(self.num_docs, dtype=np.float32)
+            for docs, scores in postings:
+                totals[docs] += scores
+            candidates = np.flatnonzero(totals)
+            totals = totals[candidates]
+        else:
+            docs = np.concatenate([docs for docs, _ in postings])
+            scores = np.concatenate([scores for _, scores in postings])
+            candidates, inverse = np.unique(docs, return_inverse=True)
+            totals = np.bincount(inverse, weights=scores)
+
+        k = min(k, len(candidates))
+        top = np.argpartition(-totals, k - 1)[:k]
+        top = top[np.argsort(-totals[top], kind="stable")]
+        return [(int(candidates[i]), float(totals[i])) for i in top]
+
+    def get_paper(self, doc_id: int) -> Dict:
+        start, end = int(self.doc_offsets[doc_id]), int(self.doc_offsets[doc_id + 1])
+        with open(self.index_dir / "docs.jsonl", "rb") as f:
+            f.seek(start)
+            return json.loads(f.read(end - start))
+
+    def query(self, keyword: str, max_results: int = 1) -> List[Dict]:
+        return [self.get_paper(doc_id) for doc_id, _ in self.search(keyword, k=max_results)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query a local arXiv BM25 index")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="Ingest an arXiv metadata JSONL dump")
+    build.add_argument("jsonl_path")
+    build.add_argument("index_dir")
+    build.add_argument("--block-docs", type=int, default=100000)
+    build.add_argument("--limit", type=int, default=None)
+
+    search = commands.add_parser("query", help="Search an existing index")
+    search.add_argument("index_dir")
+    search.add_argument("keyword")
+    search.add_argument("-k", type=int, default=5)
+
+    args = parser.parse_args()
+
+    if args.command == "build":
+        stats = build_index(args.jsonl_path, args.index_dir, block_docs=args.block_docs, limit=args.limit)
+        print(
+            f"Indexed {stats['documents']} papers, {stats['terms']} terms, {stats['postings']} postings "
+            f"in {stats['seconds']:.1f}s ({stats['docs_per_second']:.0f} docs/s)"
+        )
+    else:
+        index = LocalArxivIndex(args.index_dir)
+        start = time.perf_counter()
+        papers = index.query(args.keyword, max_results=args.k)
+        elapsed = (time.perf_counter() - start) * 1000
+        for paper in papers:
+            print(f"  • {paper['title']}")
+            print(f"    {paper['url']}  ({paper['published']})")
+        print(f"{len(papers)} results in {elapsed:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
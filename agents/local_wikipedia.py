@@ -0,0 +1,228 @@
+import re
+import bz2
+import gzip
+import time
+import sqlite3
+import hashlib
+import argparse
+import threading
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Dict, IO, Iterator, List, Tuple
+
+
+TITLE_PREFIX = "Wikipedia: "
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    abstract TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    ingest_run INTEGER NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5(
+    title, abstract, content='pages', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS pages_ai AFTER INSERT ON pages BEGIN
+    INSERT INTO pages_fts(rowid, title, abstract) VALUES (new.id, new.title, new.abstract);
+END;
+CREATE TRIGGER IF NOT EXISTS pages_ad AFTER DELETE ON pages BEGIN
+    INSERT INTO pages_fts(pages_fts, rowid, title, abstract) VALUES ('delete', old.id, old.title, old.abstract);
+END;
+CREATE TRIGGER IF NOT EXISTS pages_au AFTER UPDATE OF title, abstract ON pages BEGIN
+    INSERT INTO pages_fts(pages_fts, rowid, title, abstract) VALUES ('delete', old.id, old.title, old.abstract);
+    INSERT INTO pages_fts(rowid, title, abstract) VALUES (new.id, new.title, new.abstract);
+END;
+"""
+
+# Unchanged pages only get their ingest_run bumped, which leaves the FTS
+# index untouched; changed pages re-index through the update trigger.
+UPSERT = """
+INSERT INTO pages (url, title, abstract, content_hash, ingest_run) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT(url) DO UPDATE SET
+    title = excluded.title,
+    abstract = excluded.abstract,
+    content_hash = excluded.content_hash,
+    ingest_run = excluded.ingest_run
+WHERE pages.content_hash != excluded.content_hash
+"""
+TOUCH = "UPDATE pages SET ingest_run = ? WHERE url = ? AND content_hash = ?"
+
+
+def _open_dump(path: Path) -> IO[bytes]:
+    if path.suffix == ".gz":
+        return gzip.open(path, "rb")
+    if path.suffix == ".bz2":
+        return bz2.open(path, "rb")
+    return open(path, "rb")
+
+
+def iter_abstracts(path: Path) -> Iterator[Tuple[str, str, str]]:
+    with _open_dump(path) as f:
+        context = ET.iterparse(f, events=("start", "end"))
+        _, root = next(context)
+
+        for event, element in context:
+            if event != "end" or element.tag != "doc":
+                continue
+
+            title = (element.findtext("title") or "").strip()
+            if title.startswith(TITLE_PREFIX):
+                title = title[len(TITLE_PREFIX):]
+            url = (element.findtext("url") or "").strip()
+            abstract = (element.findtext("abstract") or "").strip()
+
+            # Drop every finished <doc> from the root so the dump is never
+            # held in memory, no matter how many pages it has.
+            root.clear()
+
+            if title and url:
+                yield title, url, abstract
+
+
+class LocalWikipediaIndex:
+
+    def __init__(self, db_path: str, create: bool = False):
+        self.db_path = Path(db_path)
+        # Only ingest may create the database; opening a mistyped path would
+        # otherwise silently serve empty results for every keyword.
+        if not create and not self.db_path.is_file():
+            raise FileNotFoundError(
+                f"No local Wikipedia index found at {self.db_path}\n"
+                f"Build one with: python -m agents.local_wikipedia ingest <abstracts dump> {self.db_path}"
+            )
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def ingest(self, dump_path: str, batch_size: int = 5000, prune: bool = False) -> Dict:
+        dump_path = Path(dump_path)
+        start_time = time.time()
+
+        with self._lock:
+            run = (self._conn.execute("SELECT COALESCE(MAX(ingest_run), 0) FROM pages").fetchone()[0]) + 1
+            pages_before = self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+        changed = 0
+        seen = 0
+        batch: List[Tuple[str, str, str, str, int]] = []
+
+        def flush():
+            nonlocal changed
+            with self._lock:
+                # rowcount excludes the FTS rows written by triggers.
+                changed += self._conn.executemany(UPSERT, batch).rowcount
+                self._conn.executemany(TOUCH, [(run, row[0], row[3]) for row in batch])
+                self._conn.commit()
+            batch.clear()
+
+        for title, url, abstract in iter_abstracts(dump_path):
+            content_hash = hashlib.sha1(f"{title}\x00{abstract}".encode("utf-8")).hexdigest()
+            batch.append((url, title, abstract, content_hash, run))
+            seen += 1
+            if len(batch) >= batch_size:
+                flush()
+                if seen % (batch_size * 20) == 0:
+                    elapsed = time.time() - start_time
+                    print(f"  {seen} pages ({seen / elapsed:.0f} pages/s)")
+        if batch:
+            flush()
+
+        removed = 0
+        with self._lock:
+            if prune:
+                removed = self._conn.execute("DELETE FROM pages WHERE ingest_run < ?", (run,)).rowcount
+            pages_after = self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+            self._conn.execute("INSERT INTO pages_fts(pages_fts) VALUES ('optimize')")
+            self._conn.commit()
+
+        elapsed = time.time() - start_time
+        inserted = pages_after - pages_before + removed
+        dump_bytes = dump_path.stat().st_size
+        return {
+            "pages_seen": seen,
+            "inserted": inserted,
+            "updated": changed - inserted,
+            "unchanged": seen - changed,
+            "removed": removed,
+            "seconds": elapsed,
+            "pages_per_second": seen / elapsed if elapsed > 0 else 0.0,
+            "mb_per_second": dump_bytes / (1024 * 1024) / elapsed if elapsed > 0 else 0.0
+        }
+
+    def _match_query(self, keyword: str, operator: str) -> str:
+        # Quote every token so user text can never be read as FTS5 syntax.
+        tokens = TOKEN_PATTERN.findall(keyword)
+        return f" {operator} ".join(f'"{token}"' for token in tokens)
+
+    def search(self, keyword: str, limit: int = 1) -> List[Dict[str, str]]:
+        rows = []
+        # Prefer pages matching every term; fall back to any term.
+        for operator in ("AND", "OR"):
+            match = self._match_query(keyword, operator)
+            if not match:
+                return []
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT p.title, p.url, p.abstract FROM pages_fts "
+                    "JOIN pages p ON p.id = pages_fts.rowid "
+                    "WHERE pages_fts MATCH ? ORDER BY bm25(pages_fts, 10.0, 1.0) LIMIT ?",
+                    (match, limit)
+                ).fetchall()
+            if rows:
+                break
+
+        return [
+            {"source": "wikipedia", "title": title, "url": url, "content": abstract}
+            for title, url, abstract in rows
+        ]
+
+    def lookup(self, keyword: str) -> Dict[str, str]:
+        results = self.search(keyword, limit=1)
+        return results[0] if results else {"source": "wikipedia", "title": "", "url": "", "content": ""}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query a local Wikipedia abstracts index")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest = commands.add_parser("ingest", help="Ingest an enwiki abstracts dump (.xml, .xml.gz or .xml.bz2)")
+    ingest.add_argument("dump_path")
+    ingest.add_argument("db_path")
+    ingest.add_argument("--batch-size", type=int, default=5000)
+    ingest.add_argument("--prune", action="store_true", help="Delete pages missing from this dump")
+
+    search = commands.add_parser("query", help="Search an existing index")
+    search.add_argument("db_path")
+    search.add_argument("keyword")
+    search.add_argument("-k", type=int, default=5)
+
+    args = parser.parse_args()
+    index = LocalWikipediaIndex(args.db_path, create=args.command == "ingest")
+
+    if args.command == "ingest":
+        stats = index.ingest(args.dump_path, batch_size=args.batch_size, prune=args.prune)
+        print(
+            f"Ingested {stats['pages_seen']} pages in {stats['seconds']:.1f}s "
+            f"({stats['pages_per_second']:.0f} pages/s, {stats['mb_per_second']:.1f} MB/s): "
+            f"{stats['inserted']} new, {stats['updated']} updated, {stats['unchanged']} unchanged, "
+            f"{stats['removed']} removed"
+        )
+    else:
+        start = time.perf_counter()
+        results = index.search(args.keyword, limit=args.k)
+        elapsed = (time.perf_counter() - start) * 1000
+        for result in results:
+            print(f"  • {result['title']}")
+            print(f"    {result['url']}")
+        print(f"{len(results)} results in {elapsed:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
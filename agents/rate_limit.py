@@ -0,0 +1,265 @@
+import time
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+from .http_transport import RETRYABLE_STATUS_CODES, full_jitter, parse_retry_after
+from .tokens import estimate_tokens
+
+
+# Per-model budgets for our Groq tier. Requests and tokens are both counted
+# over a sliding one-minute window.
+DEFAULT_MODEL_LIMITS = {
+    "openai/gpt-oss-120b": {"rpm": 30, "tpm": 8000},
+    "openai/gpt-oss-20b": {"rpm": 30, "tpm": 8000},
+}
+FALLBACK_LIMITS = {"rpm": 30, "tpm": 6000}
+
+
+class ModelRateLimiter:
+    def __init__(self, rpm: int, tpm: int, window: float = 60.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.window = window
+        self._clock = clock
+
+        self._cond = threading.Condition()
+        # Each entry is [started_at, tokens]; tokens are corrected once the
+        # provider reports actual usage.
+        self._entries: Deque[List[float]] = deque()
+        self._tokens_in_window = 0.0
+        self._waiting: Deque[object] = deque()
+        self._resume_at = 0.0
+
+        self._requests = 0
+        self._rate_limited = 0
+        self._retries = 0
+        self._waits = 0
+        self._wait_seconds = 0.0
+        self._max_wait = 0.0
+
+    def _prune(self, now: float):
+        while self._entries and self._entries[0][0] <= now - self.window:
+            self._tokens_in_window -= self._entries.popleft()[1]
+
+    def _delay(self, now: float, tokens: int) -> float:
+        # Seconds until a request of this size fits; 0 when it fits now.
+        delay = max(0.0, self._resume_at - now)
+        if len(self._entries) >= self.rpm:
+            delay = max(delay, self._entries[0][0] + self.window - now)
+
+        # A request bigger than the whole budget still runs once the window
+        # is empty, rather than waiting forever.
+        excess = self._tokens_in_window + tokens - self.tpm
+        if excess > 0 and self._entries:
+            freed = 0.0
+            for started_at, entry_tokens in self._entries:
+                freed += entry_tokens
+                if freed >= excess:
+                    delay = max(delay, started_at + self.window - now)
+                    break
+            else:
+                delay = max(delay, self._entries[-1][0] + self.window - now)
+        return delay
+
+    def acquire(self, tokens: int) -> List[float]:
+        # Callers are served strictly first come, first served, so a large
+        # request is never starved by a stream of small ones.
+        ticket = object()
+        start = self._clock()
+        with self._cond:
+            self._waiting.append(ticket)
+            while True:
+                now = self._clock()
+                self._prune(now)
+                if self._waiting[0] is ticket:
+                    delay = self._delay(now, tokens)
+                    if delay <= 0:
+                        break
+                    self._cond.wait(timeout=delay)
+                else:
+                    self._cond.wait()
+
+            self._waiting.popleft()
+            entry = [now, float(tokens)]
+            self._entries.append(entry)
+            self._tokens_in_window += tokens
+            self._requests += 1
+
+            waited = now - start
+            if waited > 0.001:
+                self._waits += 1
+                self._wait_seconds += waited
+                self._max_wait = max(self._max_wait, waited)
+            self._cond.notify_all()
+        return entry
+
+    def settle(self, entry: List[float], tokens: int):
+        with self._cond:
+            if any(existing is entry for existing in self._entries):
+                self._tokens_in_window += tokens - entry[1]
+            entry[1] = float(tokens)
+            self._cond.notify_all()
+
+    def defer(self, delay: float):
+        # The provider told us to back off: hold every queued caller, not
+        # just the one that got the 429.
+        with self._cond:
+            self._rate_limited += 1
+            self._resume_at = max(self._resume_at, self._clock() + delay)
+            self._cond.notify_all()
+
+    def count_retry(self):
+        with self._cond:
+            self._retries += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            self._prune(self._clock())
+            return {
+                "rpm_limit": self.rpm,
+                "tpm_limit": self.tpm,
+                "requests_in_window": len(self._entries),
+                "tokens_in_window": int(self._tokens_in_window),
+                "queue_depth": len(self._waiting),
+                "requests": self._requests,
+                "rate_limited": self._rate_limited,
+                "retries": self._retries,
+                "waits": self._waits,
+                "total_wait_seconds": round(self._wait_seconds, 3),
+                "avg_wait_seconds": round(self._wait_seconds / self._waits, 3) if self._waits else 0.0,
+                "max_wait_seconds": round(self._max_wait, 3)
+            }
+
+
+_limiters: Dict[str, ModelRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(model_name: str) -> ModelRateLimiter:
+    # One limiter per model per process, shared by every agent using it.
+    with _limiters_lock:
+        limiter = _limiters.get(model_name)
+        if limiter is None:
+            limits = DEFAULT_MODEL_LIMITS.get(model_name, FALLBACK_LIMITS)
+            limiter = ModelRateLimiter(limits["rpm"], limits["tpm"])
+            _limiters[model_name] = limiter
+        return limiter
+
+
+def rate_limit_stats() -> Dict[str, Dict[str, Any]]:
+    with _limiters_lock:
+        limiters = dict(_limiters)
+    return {model_name: limiter.stats() for model_name, limiter in limiters.items()}
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    return parse_retry_after(headers.get("retry-after") if headers is not None else None)
+
+
+def _prompt_text(prompt: Any) -> str:
+    if isinstance(prompt, str):
+        return prompt
+    if isinstance(prompt, list):
+        return "\n".join(str(getattr(message, "content", message)) for message in prompt)
+    return str(prompt)
+
+
+class RateLimitedLLM:
+    def __init__(
+        self,
+        llm,
+        model_name: str,
+        limiter: Optional[ModelRateLimiter] = None,
+        max_retries: int = 4,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+        expected_output_tokens: int = 1024
+    ):
+        self.llm = llm
+        self.model_name = model_name
+        self.limiter = limiter or get_rate_limiter(model_name)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.expected_output_tokens = expected_output_tokens
+
+    def __getattr__(self, name: str):
+        return getattr(self.llm, name)
+
+    def _reserve(self, prompt: Any, output_tokens: Optional[int] = None) -> List[float]:
+        # Output length is unknown up front, so reserve a typical completion
+        # and correct the entry once usage is reported.
+        if output_tokens is None:
+            output_tokens = self.expected_output_tokens
+        return self.limiter.acquire(estimate_tokens(_prompt_text(prompt)) + output_tokens)
+
+    def _settle(self, entry: List[float], message: Any):
+        usage = getattr(message, "usage_metadata", None)
+        if usage and usage.get("total_tokens"):
+            self.limiter.settle(entry, usage["total_tokens"])
+
+    def _handle_error(self, error: Exception, attempt: int):
+        # Re-raises when the error is not retryable or retries are used up.
+        status = _status_code(error)
+        if status not in RETRYABLE_STATUS_CODES or attempt >= self.max_retries:
+            raise error
+
+        delay = full_jitter(attempt, self.backoff_base, self.backoff_max)
+        if status == 429:
+            retry_after = _retry_after(error)
+            if retry_after is not None:
+                delay = min(self.backoff_max, retry_after)
+            self.limiter.defer(delay)
+        else:
+            time.sleep(delay)
+        self.limiter.count_retry()
+
+    def invoke(self, prompt: Any, output_tokens: Optional[int] = None, **kwargs):
+        attempt = 0
+        while True:
+            entry = self._reserve(prompt, output_tokens)
+            try:
+                response = self.llm.invoke(prompt, **kwargs)
+            except Exception as e:
+                # A rejected call used no tokens; keep its request slot but
+                # stop its reservation holding back the retry.
+                self.limiter.settle(entry, 0)
+                self._handle_error(e, attempt)
+                attempt += 1
+                continue
+            self._settle(entry, response)
+            return response
+
+    def stream(self, prompt: Any, output_tokens: Optional[int] = None, **kwargs) -> Iterator[Any]:
+        # Retries are only safe before the first chunk reaches the caller.
+        attempt = 0
+        while True:
+            entry = self._reserve(prompt, output_tokens)
+            chunks = self.llm.stream(prompt, **kwargs)
+            try:
+                first = next(chunks)
+            except StopIteration:
+                return
+            except Exception as e:
+                self.limiter.settle(entry, 0)
+                self._handle_error(e, attempt)
+                attempt += 1
+                continue
+            break
+
+        last = first
+        yield first
+        for chunk in chunks:
+            last = chunk
+            yield chunk
+        self._settle(entry, last)
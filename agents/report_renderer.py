@@ -0,0 +1,229 @@
+import io
+import re
+import html
+import hashlib
+from datetime import datetime
+from functools import lru_cache
+from typing import BinaryIO, Dict, Iterator, Tuple, Union
+
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.lib.enums import TA_JUSTIFY, TA_CENTER
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, HRFlowable
+
+
+SECTION_HEADINGS = ['Introduction', 'Main Findings', 'Applications', 'Challenges', 'Conclusion']
+
+
+def clean_text_for_pdf(text: str) -> str:
+    text = text.replace('—', '-')
+    text = text.replace('–', '-')
+    text = text.replace('"', '"').replace('"', '"')
+    text = text.replace(''', "'").replace(''', "'")
+    text = text.replace('\xa0', ' ')
+    text = re.sub(r'\*\*([^*]+)\*\*', r'\1', text)
+    text = re.sub(r'\*([^*]+)\*', r'\1', text)
+    text = re.sub(r'#{1,6}\s*', '', text)
+    text = text.encode('ascii', 'ignore').decode('ascii')
+
+    return text
+
+
+def format_equations(text: str) -> str:
+    text = re.sub(r'\^(\d+)', r'<super>\1</super>', text)
+    text = re.sub(r'_(\d+)', r'<sub>\1</sub>', text)
+    text = re.sub(r'\^([a-zA-Z])', r'<super>\1</super>', text)
+    text = re.sub(r'_([a-zA-Z])', r'<sub>\1</sub>', text)
+
+    return text
+
+
+def is_heading(para_text: str) -> bool:
+    para_text = para_text.strip()
+    return (
+        para_text in SECTION_HEADINGS or
+        para_text.isupper() or
+        (len(para_text) < 50 and ':' not in para_text)
+    )
+
+
+def iter_blocks(report_text: str) -> Iterator[Tuple[str, str]]:
+    # ("heading" | "paragraph", text) pairs, shared by every output format.
+    for para_text in report_text.split('\n\n'):
+        if para_text.strip():
+            yield ("heading" if is_heading(para_text) else "paragraph"), para_text.strip()
+
+
+@lru_cache(maxsize=1)
+def report_styles() -> Dict[str, ParagraphStyle]:
+    # Built once per process; in the backend's PDF workers that means once
+    # per worker instead of once per download.
+    styles = getSampleStyleSheet()
+
+    return {
+        "title": ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=24,
+            textColor='#1a1a1a',
+            spaceAfter=30,
+            alignment=TA_CENTER,
+            fontName='Helvetica-Bold'
+        ),
+        "body": ParagraphStyle(
+            'CustomBody',
+            parent=styles['BodyText'],
+            fontSize=11,
+            leading=16,
+            alignment=TA_JUSTIFY,
+            spaceAfter=12,
+            fontName='Times-Roman'
+        ),
+        "subtitle": ParagraphStyle(
+            'CustomSubtitle',
+            parent=styles['Normal'],
+            fontSize=10,
+            textColor='#666666',
+            spaceAfter=20,
+            alignment=TA_CENTER,
+            fontName='Helvetica'
+        ),
+        "heading": ParagraphStyle(
+            'CustomHeading',
+            parent=styles['Heading2'],
+            fontSize=14,
+            textColor='#1a1a1a',
+            spaceAfter=12,
+            spaceBefore=16,
+            fontName='Helvetica-Bold'
+        ),
+    }
+
+
+def warm_up():
+    # Process pool initializer: pay for the stylesheet before the first job.
+    report_styles()
+
+
+def synthesis_hash(synthesis: Dict[str, str]) -> str:
+    payload = "\x00".join([synthesis['topic'], synthesis['report_text'], synthesis.get('generated_at', '')])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _report_date(synthesis: Dict[str, str]) -> str:
+    # Show when the report was generated, not when it was rendered, so a
+    # cached PDF reads the same as a fresh one.
+    try:
+        generated_at = datetime.fromisoformat(synthesis['generated_at'])
+    except (KeyError, TypeError, ValueError):
+        generated_at = datetime.now()
+    return generated_at.strftime("%B %d, %Y")
+
+
+def build_pdf(synthesis: Dict[str, str], output: Union[str, BinaryIO]):
+    doc = SimpleDocTemplate(
+        output,
+        pagesize=letter,
+        rightMargin=72,
+        leftMargin=72,
+        topMargin=72,
+        bottomMargin=18
+    )
+
+    styles = report_styles()
+    story = []
+
+    title = Paragraph(f"Research Report:<br/>{synthesis['topic']}", styles["title"])
+    story.append(title)
+
+    subtitle = Paragraph(f"Generated on {_report_date(synthesis)}", styles["subtitle"])
+    story.append(subtitle)
+    story.append(Spacer(1, 0.2*inch))
+
+    story.append(HRFlowable(width="100%", thickness=1, color='#cccccc'))
+    story.append(Spacer(1, 0.3*inch))
+
+    report_text = clean_text_for_pdf(synthesis['report_text'])
+
+    for kind, text in iter_blocks(report_text):
+        if kind == "heading":
+            story.append(Paragraph(text, styles["heading"]))
+        else:
+            story.append(Paragraph(format_equations(text), styles["body"]))
+
+    story.append(Spacer(1, 0.5*inch))
+
+    doc.build(story)
+
+
+def render_pdf_bytes(synthesis: Dict[str, str]) -> bytes:
+    buffer = io.BytesIO()
+    build_pdf(synthesis, buffer)
+    return buffer.getvalue()
+
+
+# HTML and Markdown keep the full Unicode text; only the PDF needs ASCII.
+HTML_EMPHASIS = [
+    (re.compile(r'\*\*([^*]+)\*\*'), r'<strong>\1</strong>'),
+    (re.compile(r'\*([^*]+)\*'), r'<em>\1</em>'),
+]
+HTML_STYLE = (
+    "body{max-width:46rem;margin:2rem auto;padding:0 1rem;font:1.05rem/1.6 Georgia,'Times New Roman',serif;color:#1a1a1a}"
+    "h1{font-family:Helvetica,Arial,sans-serif;text-align:center}"
+    "h2{font-family:Helvetica,Arial,sans-serif;margin-top:1.6em}"
+    ".generated{text-align:center;color:#666;font-family:Helvetica,Arial,sans-serif}"
+    "p{text-align:justify}"
+)
+
+
+def _html_equations(text: str) -> str:
+    return format_equations(text).replace('<super>', '<sup>').replace('</super>', '</sup>')
+
+
+def iter_html(synthesis: Dict[str, str], standalone: bool = True) -> Iterator[str]:
+    topic = html.escape(synthesis['topic'])
+    if standalone:
+        yield (
+            f'<!DOCTYPE html>\n<html lang="en">\n<head>\n<meta charset="utf-8">\n'
+            f'<title>Research Report: {topic}</title>\n<style>{HTML_STYLE}</style>\n</head>\n<body>\n'
+        )
+    yield (
+        f'<article class="report">\n<h1>Research Report:<br>{topic}</h1>\n'
+        f'<p class="generated">Generated on {_report_date(synthesis)}</p>\n<hr>\n'
+    )
+
+    for kind, text in iter_blocks(synthesis['report_text'].replace('\xa0', ' ')):
+        text = re.sub(r'^#{1,6}\s*', '', text)
+        if kind == "heading":
+            yield f'<h2>{html.escape(text.strip("*"))}</h2>\n'
+        else:
+            text = html.escape(text, quote=False)
+            for pattern, replacement in HTML_EMPHASIS:
+                text = pattern.sub(replacement, text)
+            yield f'<p>{_html_equations(text)}</p>\n'
+
+    yield '</article>\n'
+    if standalone:
+        yield '</body>\n</html>\n'
+
+
+def iter_markdown(synthesis: Dict[str, str]) -> Iterator[str]:
+    yield f"# Research Report: {synthesis['topic']}\n\n_Generated on {_report_date(synthesis)}_\n\n---\n\n"
+
+    for kind, text in iter_blocks(synthesis['report_text'].replace('\xa0', ' ')):
+        text = re.sub(r'^#{1,6}\s*', '', text)
+        if kind == "heading":
+            yield f"## {text.strip('*')}\n\n"
+        else:
+            # Inline <sup>/<sub> HTML is valid Markdown, so stray angle
+            # brackets in the text are escaped to keep them literal.
+            yield f"{_html_equations(html.escape(text, quote=False))}\n\n"
+
+
+def render_html(synthesis: Dict[str, str], standalone: bool = True) -> str:
+    return "".join(iter_html(synthesis, standalone=standalone))
+
+
+def render_markdown(synthesis: Dict[str, str]) -> str:
+    return "".join(iter_markdown(synthesis))
@@ -1,145 +1,554 @@
 import os
+import re
 import time
-import requests
-from typing import List, Dict
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterator, List, Dict, Optional, Tuple
 from pathlib import Path
 from dotenv import load_dotenv
 
+from .http_transport import HttpTransport, HostPacer
+from .cache import RetrievalCache
+from .atom_parser import iter_arxiv_entries, parse_arxiv_feed
+from .local_arxiv import LocalArxivIndex
+from .local_wikipedia import LocalWikipediaIndex
+from .sources import SOURCE_REGISTRY
+
 load_dotenv()
 
 
+QUERY_STOPWORDS = {"a", "an", "and", "the", "of", "for", "in", "on", "to", "with", "by", "via"}
+
+# action=query returns intro extracts for at most 20 pages per request.
+WIKI_EXTRACTS_LIMIT = 20
+
+
 class RetrieverAgent:
-    def __init__(self):
+    def __init__(
+        self,
+        max_workers: int = 8,
+        host_intervals: Optional[Dict[str, float]] = None,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 15.0,
+        max_retries: int = 3,
+        cache: Optional[RetrievalCache] = None,
+        use_cache: bool = True,
+        batch_wikipedia: bool = True,
+        batch_arxiv: bool = True,
+        arxiv_max_results: int = 1,
+        arxiv_batch_oversample: int = 5,
+        local_arxiv_index: Optional[str] = None,
+        local_wikipedia_db: Optional[str] = None,
+        sources: Optional[List[str]] = None,
+        source_options: Optional[Dict[str, Dict[str, Any]]] = None
+    ):
         self.wiki_search_url = "https://en.wikipedia.org/w/rest.php/v1/search/page"
         self.wiki_summary_url = "https://en.wikipedia.org/api/rest_v1/page/summary"
+        self.wiki_action_url = "https://en.wikipedia.org/w/api.php"
         self.arxiv_api_url = "http://export.arxiv.org/api/query"
         
         self.headers = {
             "User-Agent": "ResearchPlannerApp/1.0 (Educational Project)"
         }
+        
+        self.max_workers = max_workers
+        self.batch_wikipedia = batch_wikipedia
+        self.batch_arxiv = batch_arxiv
+        self.arxiv_max_results = arxiv_max_results
+        self.arxiv_batch_oversample = arxiv_batch_oversample
+        self.transport = HttpTransport(
+            headers=self.headers,
+            connect_timeout=connect_timeout,
+            read_timeout=read_timeout,
+            max_retries=max_retries,
+            pool_maxsize=max_workers,
+            pacer=HostPacer(host_intervals)
+        )
+        
+        # Local indexes, when configured, replace the live APIs entirely.
+        local_arxiv_index = local_arxiv_index or os.getenv("LOCAL_ARXIV_INDEX")
+        self.local_arxiv = LocalArxivIndex(local_arxiv_index) if local_arxiv_index else None
+        local_wikipedia_db = local_wikipedia_db or os.getenv("LOCAL_WIKIPEDIA_DB")
+        self.local_wikipedia = LocalWikipediaIndex(local_wikipedia_db) if local_wikipedia_db else None
+        
+        if cache is None and use_cache:
+            cache = RetrievalCache()
+        self.cache = cache
+        
+        source_options = source_options or {}
+        self.sources = [
+            SOURCE_REGISTRY[name](self, **source_options.get(name, {}))
+            for name in (sources or ["wikipedia", "arxiv"])
+        ]
+    
+    def _empty_wikipedia(self) -> Dict[str, str]:
+        return {"source": "wikipedia", "title": "", "url": "", "content": ""}
+    
+    def _search_wikipedia_title(self, keyword: str) -> Optional[str]:
+        search_params = {"q": keyword, "limit": 1}
+        
+        search_response = self.transport.get(self.wiki_search_url, params=search_params)
+        search_response.raise_for_status()
+        
+        search_data = search_response.json()
+        pages = search_data.get('pages', [])
+        
+        return pages[0]['title'] if pages else None
+    
+    def _request_wikipedia(self, keyword: str) -> Dict[str, str]:
+        article_title = self._search_wikipedia_title(keyword)
+        
+        if not article_title:
+            return self._empty_wikipedia()
+        
+        summary_url = f"{self.wiki_summary_url}/{article_title}"
+        
+        summary_response = self.transport.get(summary_url)
+        summary_response.raise_for_status()
+        
+        summary_data = summary_response.json()
+        content = summary_data.get('extract', '')
+        url = summary_data.get('content_urls', {}).get('desktop', {}).get('page', '')
+        
+        return {
+            "source": "wikipedia",
+            "title": article_title,
+            "url": url,
+            "content": content
+        }
     
     def _fetch_wikipedia(self, keyword: str) -> Dict[str, str]:
+        if self.local_wikipedia is not None:
+            return self.local_wikipedia.lookup(keyword)
+        
+        cache_params = {"limit": 1}
+        if self.cache is not None:
+            cached = self.cache.lookup("wikipedia", keyword, cache_params)
+            if cached is not None:
+                return cached
+        
+        # Transport failures are not cached; only genuine (possibly empty)
+        # answers from the API are.
         try:
-            search_params = {"q": keyword, "limit": 1}
-            
-            search_response = requests.get(
-                self.wiki_search_url, 
-                params=search_params,
-                headers=self.headers,
-                timeout=10
-            )
-            
-            if not search_response.ok:
-                return {"source": "wikipedia", "title": "", "url": "", "content": ""}
-            
-            search_data = search_response.json()
-            pages = search_data.get('pages', [])
-            
-            if not pages:
-                return {"source": "wikipedia", "title": "", "url": "", "content": ""}
-            
-            article_title = pages[0]['title']
-            summary_url = f"{self.wiki_summary_url}/{article_title}"
+            result = self._request_wikipedia(keyword)
+        except Exception as e:
+            return self._empty_wikipedia()
+        
+        if self.cache is not None:
+            self.cache.store("wikipedia", keyword, cache_params, result)
+        return result
+    
+    def _query_wikipedia_pages(self, titles: List[str], skip_disambiguation: bool = False) -> Dict[str, Dict[str, str]]:
+        # Maps every requested title to its wikipedia dict; missing titles
+        # (and optionally disambiguation pages) are left out.
+        resolved = {}
+        
+        for start in range(0, len(titles), WIKI_EXTRACTS_LIMIT):
+            chunk = titles[start:start + WIKI_EXTRACTS_LIMIT]
+            params = {
+                "action": "query",
+                "format": "json",
+                "formatversion": 2,
+                "redirects": 1,
+                "titles": "|".join(chunk),
+                "prop": "extracts|info|pageprops",
+                "exintro": 1,
+                "explaintext": 1,
+                "exlimit": "max",
+                "inprop": "url",
+                "ppprop": "disambiguation"
+            }
             
-            summary_response = requests.get(summary_url, headers=self.headers, timeout=10)
+            pages: Dict[str, Dict] = {}
+            aliases: Dict[str, str] = {}
+            while True:
+                response = self.transport.get(self.wiki_action_url, params=params)
+                response.raise_for_status()
+                data = response.json()
+                query = data.get("query", {})
+                
+                for alias in query.get("normalized", []) + query.get("redirects", []):
+                    aliases[alias["from"]] = alias["to"]
+                for page in query.get("pages", []):
+                    pages.setdefault(page["title"], {}).update(page)
+                
+                # Large extracts can spill into continuation requests.
+                if "continue" not in data:
+                    break
+                params = {**params, **data["continue"]}
             
-            if summary_response.ok:
-                summary_data = summary_response.json()
-                content = summary_data.get('extract', '')
-                url = summary_data.get('content_urls', {}).get('desktop', {}).get('page', '')
+            for title in chunk:
+                final_title = title
+                while final_title in aliases and aliases[final_title] != final_title:
+                    final_title = aliases[final_title]
+                
+                page = pages.get(final_title)
+                if not page or page.get("missing") or page.get("invalid"):
+                    continue
+                if skip_disambiguation and "disambiguation" in page.get("pageprops", {}):
+                    continue
+                
+                # The REST summary extract is the lead's first paragraph.
+                extract = page.get("extract", "").strip()
+                content = extract.split("\n", 1)[0].strip() if extract else ""
                 
-                return {
+                resolved[title] = {
                     "source": "wikipedia",
-                    "title": article_title,
-                    "url": url,
+                    "title": page["title"],
+                    "url": page.get("fullurl", ""),
                     "content": content
                 }
-            
-            return {"source": "wikipedia", "title": "", "url": "", "content": ""}
-            
+        
+        return resolved
+    
+    def _iter_wikipedia_batch(self, keywords: List[str]) -> Iterator[Tuple[int, Dict[str, str]]]:
+        # Yields (keyword index, result) as each pass resolves, so cache hits
+        # and exact-title matches are not held back by the search pass.
+        # Results are close to, but not always identical with, the
+        # per-keyword path: a keyword that is itself an article title (or a
+        # redirect to one) resolves to that article instead of the search
+        # top hit, and content is the first paragraph of the plain-text intro
+        # extract rather than the REST summary extract.
+        if self.local_wikipedia is not None:
+            for index, keyword in enumerate(keywords):
+                yield index, self.local_wikipedia.lookup(keyword)
+            return
+        
+        # Batch answers can differ from the per-keyword path's (see
+        # _iter_wikipedia_batch), so they are cached under their own key.
+        cache_params = {"limit": 1, "mode": "batch"}
+        pending = []
+        for index, keyword in enumerate(keywords):
+            cached = self.cache.lookup("wikipedia", keyword, cache_params) if self.cache is not None else None
+            if cached is not None:
+                yield index, cached
+            else:
+                pending.append(index)
+        
+        if not pending:
+            return
+        
+        try:
+            # Pass 1: keywords that are themselves article titles (after
+            # normalization and redirects) resolve in a single request.
+            by_title = self._query_wikipedia_pages(
+                [keywords[index] for index in pending],
+                skip_disambiguation=True
+            )
         except Exception as e:
-            return {"source": "wikipedia", "title": "", "url": "", "content": ""}
+            # Fall back to the per-keyword path for everything still missing.
+            for index in pending:
+                yield index, self._fetch_wikipedia(keywords[index])
+            return
+        
+        unresolved = []
+        for index in pending:
+            page = by_title.get(keywords[index])
+            if page:
+                if self.cache is not None:
+                    self.cache.store("wikipedia", keywords[index], cache_params, page)
+                yield index, page
+            else:
+                unresolved.append(index)
+        
+        if not unresolved:
+            return
+        
+        try:
+            # Pass 2: search the rest, then fetch all their extracts at once.
+            workers = max(1, min(self.max_workers, len(unresolved)))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                found = list(executor.map(
+                    self._search_wikipedia_title,
+                    [keywords[index] for index in unresolved]
+                ))
+            searched = self._query_wikipedia_pages(sorted({title for title in found if title}))
+        except Exception as e:
+            # Fall back to the per-keyword path for whatever is still missing.
+            for index in unresolved:
+                yield index, self._fetch_wikipedia(keywords[index])
+            return
+        
+        for index, title in zip(unresolved, found):
+            result = searched.get(title, self._empty_wikipedia()) if title else self._empty_wikipedia()
+            if self.cache is not None:
+                self.cache.store("wikipedia", keywords[index], cache_params, result)
+            yield index, result
+    
+    def _fetch_wikipedia_batch(self, keywords: List[str]) -> List[Dict[str, str]]:
+        results: List[Optional[Dict[str, str]]] = [None] * len(keywords)
+        for index, result in self._iter_wikipedia_batch(keywords):
+            results[index] = result
+        return results
+    
+    def _stream_arxiv(self, search_query: str, max_results: int) -> Iterator[Dict]:
+        params = {
+            "search_query": search_query,
+            "start": 0,
+            "max_results": max_results,
+            "sortBy": "relevance",
+            "sortOrder": "descending"
+        }
+        
+        # Parse entries as they stream in instead of buffering the whole feed.
+        with self.transport.get(self.arxiv_api_url, params=params, stream=True) as response:
+            response.raise_for_status()
+            yield from iter_arxiv_entries(response.iter_content(chunk_size=16384))
+    
+    def _request_arxiv(self, search_query: str, max_results: int) -> List[Dict]:
+        return list(self._stream_arxiv(search_query, max_results))
     
     def _fetch_arxiv(self, keyword: str, max_results: int = 1) -> List[Dict]:
+        if self.local_arxiv is not None:
+            return self.local_arxiv.query(keyword, max_results)
+        
+        cache_params = {"max_results": max_results}
+        if self.cache is not None:
+            cached = self.cache.lookup("arxiv", keyword, cache_params)
+            if cached is not None:
+                return cached
+        
         try:
-            params = {
-                "search_query": f"all:{keyword}",
-                "start": 0,
-                "max_results": max_results,
-                "sortBy": "relevance",
-                "sortOrder": "descending"
-            }
-            
-            response = requests.get(self.arxiv_api_url, params=params, timeout=15)
-            
-            if not response.ok:
-                return []
-            
-            papers = self._parse_arxiv_response(response.text)
-            return papers
-            
+            papers = self._request_arxiv(f"all:{keyword}", max_results)
         except Exception as e:
             return []
+        
+        if self.cache is not None:
+            self.cache.store("arxiv", keyword, cache_params, papers)
+        return papers
+    
+    def _query_terms(self, text: str) -> List[str]:
+        return [t for t in re.findall(r"[a-z0-9]+", text.lower()) if t not in QUERY_STOPWORDS]
+    
+    def _term_score(self, terms: List[str], tokens: set) -> float:
+        # Fraction of keyword terms present, tolerating a plural "s" either way.
+        matched = sum(
+            1 for t in terms
+            if t in tokens or f"{t}s" in tokens or (t.endswith("s") and t[:-1] in tokens)
+        )
+        return matched / len(terms)
+    
+    def _iter_arxiv_batch(self, keywords: List[str], max_results: int = 1) -> Iterator[Tuple[int, List[Dict]]]:
+        if self.local_arxiv is not None:
+            for index, keyword in enumerate(keywords):
+                yield index, self.local_arxiv.query(keyword, max_results)
+            return
+        
+        cache_params = {"max_results": max_results, "mode": "batch"}
+        pending = []
+        for index, keyword in enumerate(keywords):
+            cached = self.cache.lookup("arxiv", keyword, cache_params) if self.cache is not None else None
+            if cached is not None:
+                yield index, cached
+            elif not self._query_terms(keyword):
+                yield index, []
+            else:
+                pending.append(index)
+        
+        if not pending:
+            return
+        
+        clauses = [
+            "(" + " AND ".join(f"all:{term}" for term in self._query_terms(keywords[index])) + ")"
+            for index in pending
+        ]
+        batch_size = min(100, len(pending) * max_results * self.arxiv_batch_oversample)
+        terms = {index: self._query_terms(keywords[index]) for index in pending}
+        # Per keyword: papers containing every keyword term, in arXiv's
+        # relevance order.
+        matches: Dict[int, List[Dict]] = {index: [] for index in pending}
+        
+        def fall_back(index: int) -> Tuple[int, List[Dict]]:
+            # One request for this keyword alone; cached under its own key.
+            pending.remove(index)
+            return index, self._fetch_arxiv(keywords[index], max_results)
+        
+        papers = self._stream_arxiv(" OR ".join(clauses), batch_size)
+        while pending:
+            try:
+                paper = next(papers, None)
+            except Exception as e:
+                # Fall back to one request per keyword rather than losing arXiv entirely.
+                for index in list(pending):
+                    yield fall_back(index)
+                return
+            
+            if paper is None:
+                # Other keywords crowded this one out of the shared feed. A
+                # partial match is not what its own query would return, so
+                # ask arXiv directly and keep nothing partial in the cache.
+                for index in list(pending):
+                    yield fall_back(index)
+                return
+            
+            tokens = set(self._query_terms(f"{paper['title']} {paper['abstract']}"))
+            for index in list(pending):
+                if self._term_score(terms[index], tokens) < 1.0:
+                    continue
+                matches[index].append(paper)
+                # Entries arrive in relevance order, so once a keyword has its
+                # full quota of full matches it is settled without waiting
+                # for the rest of the feed.
+                if len(matches[index]) >= max_results:
+                    pending.remove(index)
+                    if self.cache is not None:
+                        self.cache.store("arxiv", keywords[index], cache_params, matches[index])
+                    yield index, matches[index]
+        papers.close()
+    
+    def _fetch_arxiv_batch(self, keywords: List[str], max_results: int = 1) -> List[List[Dict]]:
+        results: List[Optional[List[Dict]]] = [None] * len(keywords)
+        for index, keyword_papers in self._iter_arxiv_batch(keywords, max_results):
+            results[index] = keyword_papers
+        return results
     
     def _parse_arxiv_response(self, xml_text: str) -> List[Dict]:
         try:
-            papers = []
-            entries = xml_text.split('<entry>')
+            return parse_arxiv_feed(xml_text)
+        except Exception as e:
+            return []
+    
+    def _retrieve_sequential(self, keywords: List[str]) -> List[Dict]:
+        results = [{"keyword": keyword} for keyword in keywords]
+        
+        for source in self.sources:
+            try:
+                if source.batched:
+                    values = source.fetch_many(keywords)
+                else:
+                    values = [source.fetch(keyword) for keyword in keywords]
+            except Exception as e:
+                values = [source.empty() for _ in keywords]
             
-            for entry in entries[1:]:
-                title_start = entry.find('<title>') + 7
-                title_end = entry.find('</title>')
-                title = entry[title_start:title_end].strip() if title_start > 6 else ""
-                
-                summary_start = entry.find('<summary>') + 9
-                summary_end = entry.find('</summary>')
-                summary = entry[summary_start:summary_end].strip() if summary_start > 8 else ""
-                
-                id_start = entry.find('<id>') + 4
-                id_end = entry.find('</id>')
-                paper_url = entry[id_start:id_end].strip() if id_start > 3 else ""
+            for result, value in zip(results, values):
+                result[source.result_key] = value
+        
+        for i, keyword in enumerate(keywords, 1):
+            print(f"  [{i}/{len(keywords)}] {keyword}")
+        
+        return results
+    
+    def retrieve_stream(self, keywords: List[str]) -> Iterator[Tuple[int, Dict]]:
+        # Yields (keyword index, result) as soon as every source has answered
+        # (or timed out) for that keyword, in completion order.
+        total_keywords = len(keywords)
+        results = [
+            {"keyword": keyword, **{source.result_key: None for source in self.sources}}
+            for keyword in keywords
+        ]
+        pending_keys = [{source.result_key for source in self.sources} for _ in keywords]
+        if not self.sources:
+            yield from enumerate(results)
+            return
+        
+        # Every source gets its own pool, so a slow or saturated source can
+        # never take workers away from the others. Workers report each
+        # (source, keyword index, value) on one queue; batched sources report
+        # keywords one by one as their passes resolve them.
+        executors = {
+            source.name: ThreadPoolExecutor(max_workers=source.max_concurrency)
+            for source in self.sources
+        }
+        updates = queue.Queue()
+        outstanding = {source.name: set(range(total_keywords)) for source in self.sources}
+        futures: Dict[str, List] = {source.name: [] for source in self.sources}
+        
+        def fetch_one(source, index: int):
+            try:
+                value = source.fetch(keywords[index])
+            except Exception as e:
+                value = None
+            updates.put((source, index, value))
+        
+        def fetch_batch(source):
+            try:
+                for index, value in source.iter_many(keywords):
+                    updates.put((source, index, value))
+            except Exception as e:
+                pass
+            # Whatever the source never answered settles as empty.
+            updates.put((source, None, None))
+        
+        start = time.monotonic()
+        for source in self.sources:
+            executor = executors[source.name]
+            if source.batched:
+                futures[source.name].append(executor.submit(fetch_batch, source))
+            else:
+                for index in range(total_keywords):
+                    futures[source.name].append(executor.submit(fetch_one, source, index))
+        
+        done_keywords = 0
+        ready: List[int] = []
+        
+        def settle(source, index: int, value=None):
+            nonlocal done_keywords
+            if index not in outstanding[source.name]:
+                return
+            outstanding[source.name].discard(index)
+            results[index][source.result_key] = value if value is not None else source.empty()
+            pending_keys[index].discard(source.result_key)
+            if not pending_keys[index]:
+                done_keywords += 1
+                print(f"  [{done_keywords}/{total_keywords}] {keywords[index]}")
+                ready.append(index)
+        
+        try:
+            while any(outstanding.values()):
+                now = time.monotonic()
                 
-                published_start = entry.find('<published>') + 11
-                published_end = entry.find('</published>')
-                published = entry[published_start:published_end].strip()[:10] if published_start > 10 else ""
+                # Sources past their deadline are dropped rather than waited on.
+                for source in self.sources:
+                    if outstanding[source.name] and now - start >= source.deadline:
+                        for future in futures[source.name]:
+                            future.cancel()
+                        for index in sorted(outstanding[source.name]):
+                            settle(source, index)
+                        print(f"  {source.name}: deadline exceeded, dropping late results")
+                while ready:
+                    index = ready.pop(0)
+                    yield index, results[index]
+                if not any(outstanding.values()):
+                    break
                 
-                if title and summary:
-                    papers.append({
-                        "source": "arxiv",
-                        "title": title,
-                        "url": paper_url,
-                        "published": published,
-                        "abstract": summary
-                    })
-            
-            return papers
-            
-        except Exception as e:
-            return []
+                next_deadline = min(
+                    start + source.deadline for source in self.sources if outstanding[source.name]
+                )
+                try:
+                    source, index, value = updates.get(timeout=max(0.0, next_deadline - now))
+                except queue.Empty:
+                    continue
+                if index is None:
+                    for index in sorted(outstanding[source.name]):
+                        settle(source, index)
+                else:
+                    settle(source, index, value)
+                while ready:
+                    index = ready.pop(0)
+                    yield index, results[index]
+        finally:
+            for executor in executors.values():
+                executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _retrieve_concurrent(self, keywords: List[str]) -> List[Dict]:
+        results: List[Optional[Dict]] = [None] * len(keywords)
+        for index, result in self.retrieve_stream(keywords):
+            results[index] = result
+        return results
     
-    def retrieve(self, keywords: List[str]) -> List[Dict]:
+    def retrieve(self, keywords: List[str], concurrent: bool = True) -> List[Dict]:
         print("\n" + "="*80)
         print("RETRIEVER AGENT")
         print("="*80)
         
-        results = []
         total_keywords = len(keywords)
         
         print(f"\nFetching sources for {total_keywords} keywords...")
         
-        for i, keyword in enumerate(keywords, 1):
-            print(f"  [{i}/{total_keywords}] {keyword}...")
-            wiki_result = self._fetch_wikipedia(keyword)
-            time.sleep(1)
-            
-            arxiv_results = self._fetch_arxiv(keyword)
-            results.append({
-                "keyword": keyword,
-                "wikipedia": wiki_result,
-                "arxiv_papers": arxiv_results
-            })
-            if i < total_keywords:
-                time.sleep(1)
+        if concurrent:
+            results = self._retrieve_concurrent(keywords)
+        else:
+            results = self._retrieve_sequential(keywords)
         
         print(f"\nFetching complete\n")
         print("="*80)
@@ -148,8 +557,8 @@ class RetrieverAgent:
         print("\n WIKIPEDIA SOURCES:\n")
         wiki_count = 0
         for result in results:
-            wiki = result['wikipedia']
-            if wiki['title']:
+            wiki = result.get('wikipedia') or {}
+            if wiki.get('title'):
                 wiki_count += 1
                 print(f"  • {wiki['title']}")
                 print(f"    {wiki['url']}")
@@ -160,7 +569,7 @@ class RetrieverAgent:
         print("ARXIV PAPERS:\n")
         arxiv_count = 0
         for result in results:
-            for paper in result['arxiv_papers']:
+            for paper in result.get('arxiv_papers', []):
                 arxiv_count += 1
                 print(f"  • {paper['title']}")
                 print(f"    {paper['url']}")
@@ -172,6 +581,22 @@ class RetrieverAgent:
         
         print("="*80)
         print(f"Total: {wiki_count} Wikipedia articles, {arxiv_count} arXiv papers")
+        for source in self.sources:
+            if source.result_key in ("wikipedia", "arxiv_papers"):
+                continue
+            count = sum(len(result.get(source.result_key) or []) for result in results)
+            print(f"  {source.name}: {count} results")
+        for host, counters in self.transport.stats().items():
+            print(
+                f"  {host}: {counters['requests']} requests, {counters['retries']} retries, "
+                f"{counters.get('reused_connections', 0)} reused connections"
+            )
+        if self.cache is not None:
+            cache_stats = self.cache.stats()
+            print(
+                f"  cache: {sum(cache_stats['hits'].values())} hits, "
+                f"{sum(cache_stats['misses'].values())} misses, {cache_stats['entries']} entries"
+            )
         print("="*80)
         
         return results
\ No newline at end of file
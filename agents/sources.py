@@ -0,0 +1,92 @@
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type
+
+
+class RetrieverSource:
+    # Subclasses set these and implement fetch(); batched sources also
+    # implement fetch_many() to answer every keyword in one call, and
+    # iter_many() to hand each keyword's answer over as soon as it is known.
+    name: str = ""
+    result_key: str = ""
+    deadline: float = 30.0
+    max_concurrency: int = 4
+
+    def __init__(self, agent, deadline: Optional[float] = None, max_concurrency: Optional[int] = None):
+        self.agent = agent
+        if deadline is not None:
+            self.deadline = deadline
+        if max_concurrency is not None:
+            self.max_concurrency = max_concurrency
+
+    @property
+    def batched(self) -> bool:
+        return False
+
+    def empty(self) -> Any:
+        return []
+
+    def fetch(self, keyword: str) -> Any:
+        raise NotImplementedError
+
+    def fetch_many(self, keywords: List[str]) -> List[Any]:
+        return [self.fetch(keyword) for keyword in keywords]
+
+    def iter_many(self, keywords: List[str]) -> Iterator[Tuple[int, Any]]:
+        # (keyword index, value) pairs in any order.
+        yield from enumerate(self.fetch_many(keywords))
+
+
+SOURCE_REGISTRY: Dict[str, Type[RetrieverSource]] = {}
+
+
+def register_source(source_class: Type[RetrieverSource]) -> Type[RetrieverSource]:
+    if not source_class.name or not source_class.result_key:
+        raise ValueError(f"{source_class.__name__} must define name and result_key")
+    SOURCE_REGISTRY[source_class.name] = source_class
+    return source_class
+
+
+@register_source
+class WikipediaSource(RetrieverSource):
+    name = "wikipedia"
+    result_key = "wikipedia"
+    deadline = 20.0
+    max_concurrency = 4
+
+    @property
+    def batched(self) -> bool:
+        return self.agent.batch_wikipedia
+
+    def empty(self) -> Dict[str, str]:
+        return self.agent._empty_wikipedia()
+
+    def fetch(self, keyword: str) -> Dict[str, str]:
+        return self.agent._fetch_wikipedia(keyword)
+
+    def fetch_many(self, keywords: List[str]) -> List[Dict[str, str]]:
+        return self.agent._fetch_wikipedia_batch(keywords)
+
+    def iter_many(self, keywords: List[str]) -> Iterator[Tuple[int, Dict[str, str]]]:
+        return self.agent._iter_wikipedia_batch(keywords)
+
+
+@register_source
+class ArxivSource(RetrieverSource):
+    name = "arxiv"
+    result_key = "arxiv_papers"
+    # export.arxiv.org is paced at one request every three seconds, so an
+    # unbatched plan needs the longer budget.
+    deadline = 30.0
+    max_concurrency = 2
+
+    @property
+    def batched(self) -> bool:
+        return self.agent.batch_arxiv
+
+    def fetch(self, keyword: str) -> List[Dict]:
+        return self.agent._fetch_arxiv(keyword, self.agent.arxiv_max_results)
+
+    def fetch_many(self, keywords: List[str]) -> List[List[Dict]]:
+        return self.agent._fetch_arxiv_batch(keywords, self.agent.arxiv_max_results)
+
+    def iter_many(self, keywords: List[str]) -> Iterator[Tuple[int, List[Dict]]]:
+        return self.agent._iter_arxiv_batch(keywords, self.agent.arxiv_max_results)
@@ -1,11 +1,22 @@
 import os
-from typing import List, Dict
+import re
+import json
+import hashlib
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterable, List, Dict, Optional, Tuple
 from pathlib import Path
 from dotenv import load_dotenv
 # from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_groq import ChatGroq
 from pydantic import BaseModel, Field
 
+from .cache import SummaryCache
+from .dedup import NearDuplicateIndex, canonical_source_key
+from .extractive import extract_key_points
+from .rate_limit import RateLimitedLLM
+from .tokens import estimate_tokens, split_text
+
 load_dotenv()
 
 
@@ -17,13 +28,58 @@ class Summary(BaseModel):
 
 class SummarizerAgent:
     
-    def __init__(self, model_name: str = "openai/gpt-oss-120b"):
-        self.llm = ChatGroq(
-            model=model_name,
-            temperature=0.3, 
-            groq_api_key=os.getenv("GROQ_API_KEY")
+    def __init__(self, model_name: str = "openai/gpt-oss-120b", max_concurrency: Optional[int] = None,
+                 packed: Optional[bool] = None, pack_token_budget: int = 3000, pack_max_sources: int = 8,
+                 cache: Optional[SummaryCache] = None, use_cache: bool = True,
+                 chunk_threshold_tokens: int = 3000, chunk_tokens: int = 1500,
+                 near_duplicate_threshold: Optional[float] = 0.8,
+                 extractive_fallback: bool = True, llm_timeout: float = 60.0):
+        self.model_name = model_name
+        # Retries and 429 handling live in RateLimitedLLM, which shares one
+        # budget per model with every other agent in the process.
+        self.llm = RateLimitedLLM(
+            ChatGroq(
+                model=model_name,
+                temperature=0.3, 
+                groq_api_key=os.getenv("GROQ_API_KEY"),
+                max_retries=0,
+                timeout=llm_timeout
+            ),
+            model_name
         )
         self.prompts = self._load_prompts()
+        
+        if max_concurrency is None:
+            max_concurrency = int(os.getenv("SUMMARIZER_MAX_CONCURRENCY", "4"))
+        self.max_concurrency = max(1, max_concurrency)
+        # Shared by every summarize call on this agent, so concurrent jobs
+        # together never have more than max_concurrency LLM requests in flight.
+        self._llm_slots = threading.BoundedSemaphore(self.max_concurrency)
+        
+        # Packed mode sends several short sources in one request, up to a
+        # prompt token budget, instead of paying a full request per source.
+        if packed is None:
+            packed = os.getenv("SUMMARIZER_PACKED", "1") != "0"
+        self.packed = packed
+        self.pack_token_budget = pack_token_budget
+        self.pack_max_sources = pack_max_sources
+        
+        if cache is None and use_cache:
+            cache = SummaryCache()
+        self.cache = cache
+        
+        # Content above the threshold is summarized in chunks and reduced;
+        # everything shorter keeps the single-call path.
+        self.chunk_threshold_tokens = chunk_threshold_tokens
+        self.chunk_tokens = chunk_tokens
+        
+        # Sources whose text is at least this similar (estimated Jaccard over
+        # word shingles) to an earlier one reuse its summary; None disables.
+        self.near_duplicate_threshold = near_duplicate_threshold
+        
+        # When an LLM call fails or times out, fall back to local extractive
+        # key points instead of an error string.
+        self.extractive_fallback = extractive_fallback
     
     def _load_prompts(self) -> Dict[str, str]:
         prompts_dir = Path(__file__).parent.parent / "prompts"
@@ -33,6 +89,9 @@ class SummarizerAgent:
         prompts['wikipedia'] = wiki_prompt_file.read_text()
         arxiv_prompt_file = prompts_dir / "summarizer_arxiv.txt"
         prompts['arxiv'] = arxiv_prompt_file.read_text()
+        prompts['packed'] = (prompts_dir / "summarizer_packed.txt").read_text()
+        prompts['packed_source'] = (prompts_dir / "summarizer_packed_source.txt").read_text()
+        prompts['reduce'] = (prompts_dir / "summarizer_reduce.txt").read_text()
         
         return prompts
     
@@ -42,6 +101,23 @@ class SummarizerAgent:
         
         return prompt
     
+    def _prompt_hash(self, source_type: str) -> str:
+        # Editing a prompt file changes this hash, which retires every cached
+        # summary produced with the old wording.
+        templates = [self.prompts.get(source_type, self.prompts['wikipedia']), self.prompts['reduce']]
+        if self.packed:
+            templates += [self.prompts['packed'], self.prompts['packed_source']]
+        return hashlib.sha256("\x00".join(templates).encode("utf-8")).hexdigest()
+    
+    def _cache_key(self, source: Dict[str, str]) -> str:
+        return SummaryCache.make_key(
+            self.model_name,
+            self._prompt_hash(source['source_type']),
+            source['source_type'],
+            source['title'],
+            source['content']
+        )
+    
     def _parse_bullet_points(self, response) -> List[str]:
         if isinstance(response, list):
             return response[:7]  
@@ -71,6 +147,43 @@ class SummarizerAgent:
         else:
             return bullets
     
+    def _invoke_llm(self, prompt: str) -> str:
+        with self._llm_slots:
+            response = self.llm.invoke(prompt)
+        return response.content if hasattr(response, 'content') else str(response)
+    
+    def _chunk_content(self, content: str) -> List[str]:
+        if estimate_tokens(content) <= self.chunk_threshold_tokens:
+            return [content]
+        return split_text(content, self.chunk_tokens)
+    
+    def _summarize_chunks(self, source_type: str, title: str, chunks: List[str]) -> List[str]:
+        # Map: every chunk is summarized with the regular prompt, in parallel.
+        def summarize_chunk(chunk: str) -> List[str]:
+            prompt = self._create_summary_prompt(source_type, title, chunk)
+            return self._parse_bullet_points(self._invoke_llm(prompt))
+        
+        with ThreadPoolExecutor(max_workers=min(len(chunks), self.max_concurrency)) as executor:
+            futures = [executor.submit(summarize_chunk, chunk) for chunk in chunks]
+        
+        partial_points = []
+        errors = []
+        for future in futures:
+            try:
+                partial_points.append(future.result())
+            except Exception as e:
+                errors.append(e)
+        if not partial_points:
+            raise errors[0]
+        
+        # Reduce: merge the per-chunk points into the final 5-7 bullets.
+        parts = "\n\n".join(
+            f"Part {i}:\n" + "\n".join(f"- {point}" for point in points)
+            for i, points in enumerate(partial_points, 1)
+        )
+        prompt = self.prompts['reduce'].format(title=title, content=parts)
+        return self._parse_bullet_points(self._invoke_llm(prompt))
+    
     def _summarize_source(self, source_type: str, title: str, content: str, url: str = "") -> Dict:
         if not content or not title:
             return {
@@ -79,15 +192,18 @@ class SummarizerAgent:
                 "url": url,
                 "key_points": ["No content available to summarize"],
                 "original_length": 0,
-                "summary_length": 0
+                "summary_length": 0,
+                "method": "none"
             }
         
-        prompt = self._create_summary_prompt(source_type, title, content)
+        chunks = self._chunk_content(content)
         
         try:
-            response = self.llm.invoke(prompt)
-            response_text = response.content if hasattr(response, 'content') else str(response)
-            key_points = self._parse_bullet_points(response_text)
+            if len(chunks) > 1:
+                key_points = self._summarize_chunks(source_type, title, chunks)
+            else:
+                prompt = self._create_summary_prompt(source_type, title, content)
+                key_points = self._parse_bullet_points(self._invoke_llm(prompt))
             
             return {
                 "source_type": source_type,
@@ -95,59 +211,284 @@ class SummarizerAgent:
                 "url": url,
                 "key_points": key_points,
                 "original_length": len(content),
-                "summary_length": sum(len(point) for point in key_points)
+                "summary_length": sum(len(point) for point in key_points),
+                "method": "llm"
             }
             
         except Exception as e:
+            if self.extractive_fallback:
+                print(f"  LLM summary failed for '{title}' ({e}), using extractive key points")
+                return self._summarize_extractive(source_type, title, content, url)
             return {
                 "source_type": source_type,
                 "title": title,
                 "url": url,
                 "key_points": [f"Error during summarization: {str(e)}"],
                 "original_length": len(content),
-                "summary_length": 0
+                "summary_length": 0,
+                "method": "llm"
             }
     
-    def summarize(self, retrieved_docs: List[Dict]) -> List[Dict]:
-        all_summaries = []
-        total_sources = sum(
-            1 + len(doc.get('arxiv_papers', [])) 
-            for doc in retrieved_docs
-        )
+    def _summarize_extractive(self, source_type: str, title: str, content: str, url: str = "") -> Dict:
+        if not content or not title:
+            return self._summarize_source(source_type, title, content, url)
         
-        current = 0
+        key_points = extract_key_points(content, count=6)
+        return {
+            "source_type": source_type,
+            "title": title,
+            "url": url,
+            "key_points": key_points,
+            "original_length": len(content),
+            "summary_length": sum(len(point) for point in key_points),
+            "method": "extractive"
+        }
+    
+    def _create_packed_prompt(self, sources: List[Dict[str, str]]) -> str:
+        labels = {"wikipedia": "(encyclopedia article)", "arxiv": "(research paper abstract)"}
+        blocks = [
+            self.prompts['packed_source'].format(
+                id=i,
+                label=labels.get(source['source_type'], ""),
+                title=source['title'],
+                content=source['content']
+            )
+            for i, source in enumerate(sources, 1)
+        ]
+        return self.prompts['packed'].format(count=len(sources), sources="\n".join(blocks))
+    
+    def _parse_packed_response(self, response_text: str, count: int) -> Dict[int, List[str]]:
+        # Models sometimes wrap the JSON in a code fence or add a preamble;
+        # only the outermost object matters.
+        match = re.search(r"\{.*\}", response_text, re.DOTALL)
+        if not match:
+            return {}
+        try:
+            data = json.loads(match.group(0))
+        except json.JSONDecodeError:
+            return {}
         
-        for doc in retrieved_docs:
-            keyword = doc['keyword']
-            summaries_for_keyword = []
+        parsed = {}
+        for item in data.get("summaries", []) if isinstance(data, dict) else []:
+            try:
+                source_id = int(item.get("id"))
+            except (AttributeError, TypeError, ValueError):
+                continue
+            points = item.get("key_points")
+            if 1 <= source_id <= count and isinstance(points, list):
+                key_points = self._parse_bullet_points("\n".join(str(point) for point in points))
+                if key_points:
+                    parsed[source_id] = key_points
+        return parsed
+    
+    def _request_count(self, source: Dict[str, str]) -> int:
+        chunks = len(self._chunk_content(source['content']))
+        return 1 if chunks == 1 else chunks + 1
+    
+    def _summarize_pack(self, sources: List[Dict[str, str]]) -> Tuple[List[Dict], int]:
+        # Returns the summaries in input order and the number of LLM requests made.
+        if len(sources) == 1:
+            return [self._summarize_source(**sources[0])], self._request_count(sources[0])
+        
+        prompt = self._create_packed_prompt(sources)
+        try:
+            parsed = self._parse_packed_response(self._invoke_llm(prompt), len(sources))
+        except Exception:
+            parsed = {}
+        
+        summaries = []
+        requests = 1
+        for i, source in enumerate(sources, 1):
+            key_points = parsed.get(i)
+            if key_points is None:
+                # Anything the packed answer did not cover goes through the
+                # single-source path, so one bad reply never loses a source.
+                summaries.append(self._summarize_source(**source))
+                requests += self._request_count(source)
+                continue
+            summaries.append({
+                "source_type": source['source_type'],
+                "title": source['title'],
+                "url": source['url'],
+                "key_points": key_points,
+                "original_length": len(source['content']),
+                "summary_length": sum(len(point) for point in key_points),
+                "method": "llm"
+            })
+        if len(parsed) < len(sources):
+            print(f"  Packed summary covered {len(parsed)}/{len(sources)} sources, summarized the rest individually")
+        
+        return summaries, requests
+    
+    def _collect_sources(self, doc: Dict) -> List[Dict[str, str]]:
+        sources = []
+        
+        wiki = doc.get('wikipedia', {})
+        if wiki.get('title'):
+            sources.append({
+                "source_type": "wikipedia",
+                "title": wiki['title'],
+                "content": wiki.get('content', ''),
+                "url": wiki.get('url', '')
+            })
+        
+        for paper in doc.get('arxiv_papers', []):
+            sources.append({
+                "source_type": "arxiv",
+                "title": paper['title'],
+                "content": paper.get('abstract', ''),
+                "url": paper.get('url', '')
+            })
+        
+        return sources
+    
+    def summarize_stream(self, indexed_docs: Iterable[Tuple[int, Dict]], stats: Optional[Dict] = None,
+                         mode: str = "llm") -> List[Dict]:
+        # Consumes (index, retrieval result) pairs as the retriever produces
+        # them and starts summarizing each new source straight away, so
+        # summarization overlaps with the rest of retrieval. mode="extractive"
+        # skips the LLM entirely.
+        if mode not in ("llm", "extractive"):
+            raise ValueError(f"Unknown summary mode: {mode}")
+        sources_by_index: Dict[int, Tuple[str, List[str]]] = {}
+        unique_sources: Dict[str, Dict[str, str]] = {}
+        pack_futures: List[Tuple[List[str], Future]] = []
+        summaries_by_key: Dict[str, Dict] = {}
+        pending: List[str] = []
+        pending_tokens = 0
+        prompt_overhead = estimate_tokens(self.prompts['packed'])
+        cached_keys = set()
+        aliases: Dict[str, str] = {}
+        near_duplicates = (
+            NearDuplicateIndex(threshold=self.near_duplicate_threshold)
+            if self.near_duplicate_threshold is not None else None
+        )
+        
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            def flush():
+                nonlocal pending_tokens
+                if pending:
+                    keys = list(pending)
+                    pack_futures.append((keys, executor.submit(self._summarize_pack, [unique_sources[key] for key in keys])))
+                    pending.clear()
+                    pending_tokens = 0
             
-            wiki = doc.get('wikipedia', {})
-            if wiki.get('title'):
-                current += 1
-                
-                wiki_summary = self._summarize_source(
-                    source_type="wikipedia",
-                    title=wiki['title'],
-                    content=wiki.get('content', ''),
-                    url=wiki.get('url', '')
-                )
-                summaries_for_keyword.append(wiki_summary)
+            # The same paper or article often comes back for several related
+            # keywords; summarize each one once and fan the result back out.
+            for index, doc in indexed_docs:
+                keyed_sources = []
+                for source in self._collect_sources(doc):
+                    key = canonical_source_key(source['source_type'], source['title'], source['url'])
+                    if key not in unique_sources:
+                        unique_sources[key] = source
+                        # Different IDs can still carry near-identical text
+                        # (paper versions, redirects); those join the first
+                        # source's cluster instead of getting their own call.
+                        representative = None
+                        if near_duplicates is not None and source['title'] and source['content']:
+                            representative = near_duplicates.add(key, source['content'])
+                        cached = None
+                        if representative is None and mode == "llm" and self.cache is not None:
+                            cached = self.cache.lookup(self._cache_key(source))
+                        
+                        if representative is not None:
+                            aliases[key] = representative
+                        elif cached is not None:
+                            summaries_by_key[key] = cached
+                            cached_keys.add(key)
+                        elif not source['title'] or not source['content']:
+                            summaries_by_key[key] = self._summarize_source(**source)
+                        elif mode == "extractive":
+                            summaries_by_key[key] = self._summarize_extractive(**source)
+                        elif not self.packed:
+                            pack_futures.append(([key], executor.submit(self._summarize_pack, [source])))
+                        else:
+                            tokens = estimate_tokens(source['title']) + estimate_tokens(source['content'])
+                            if pending and (
+                                prompt_overhead + pending_tokens + tokens > self.pack_token_budget
+                                or len(pending) >= self.pack_max_sources
+                            ):
+                                flush()
+                            pending.append(key)
+                            pending_tokens += tokens
+                    keyed_sources.append(key)
+                sources_by_index[index] = (doc['keyword'], keyed_sources)
+            flush()
             
-            arxiv_papers = doc.get('arxiv_papers', [])
-            for paper in arxiv_papers:
-                current += 1
-                
-                arxiv_summary = self._summarize_source(
-                    source_type="arxiv",
-                    title=paper['title'],
-                    content=paper.get('abstract', ''),
-                    url=paper.get('url', '')
-                )
-                summaries_for_keyword.append(arxiv_summary)
+            llm_requests = 0
+            for keys, future in pack_futures:
+                summaries, requests = future.result()
+                summaries_by_key.update(zip(keys, summaries))
+                llm_requests += requests
+                if self.cache is not None:
+                    for key, summary in zip(keys, summaries):
+                        # Only genuine LLM summaries are worth keeping; errors and
+                        # extractive fallbacks should be retried next time.
+                        if summary['method'] == "llm" and summary['summary_length'] > 0:
+                            self.cache.store(self._cache_key(unique_sources[key]), summary)
+        
+        sources_by_keyword = [sources_by_index[index] for index in sorted(sources_by_index)]
+        
+        clusters: Dict[str, List[str]] = {}
+        for key, representative in aliases.items():
+            clusters.setdefault(representative, [representative]).append(key)
+        
+        all_summaries = []
+        for keyword, keys in sources_by_keyword:
+            summaries_for_keyword = []
+            for key in keys:
+                representative = aliases.get(key, key)
+                summary = dict(summaries_by_key[representative])
+                summary['key_points'] = list(summary['key_points'])
+                if key != representative:
+                    source = unique_sources[key]
+                    summary.update({
+                        "source_type": source['source_type'],
+                        "title": source['title'],
+                        "url": source['url'],
+                        "original_length": len(source['content'])
+                    })
+                summary['near_duplicates'] = [
+                    {"title": unique_sources[member]['title'], "url": unique_sources[member]['url']}
+                    for member in clusters.get(representative, [])
+                    if member != key
+                ]
+                summaries_for_keyword.append(summary)
             
             all_summaries.append({
                 "keyword": keyword,
                 "summaries": summaries_for_keyword
             })
         
-        return all_summaries
\ No newline at end of file
+        # Sources without content, with a cached summary or folded into a
+        # near-duplicate cluster never reach the LLM, so they do not count.
+        llm_keys = {
+            key for key, source in unique_sources.items()
+            if source['title'] and source['content'] and key not in cached_keys and key not in aliases
+            and mode == "llm"
+        }
+        llm_references = sum(1 for _, keys in sources_by_keyword for key in keys if key in llm_keys)
+        run_stats = {
+            "source_references": sum(len(keys) for _, keys in sources_by_keyword),
+            "unique_sources": len(unique_sources),
+            "llm_calls": len(llm_keys),
+            "llm_calls_saved": llm_references - len(llm_keys),
+            "llm_requests": llm_requests,
+            "cache_hits": len(cached_keys),
+            "near_duplicates": len(aliases),
+            "extractive": sum(1 for summary in summaries_by_key.values() if summary.get('method') == "extractive")
+        }
+        print(
+            f"Summarized {run_stats['unique_sources']} unique sources for "
+            f"{run_stats['source_references']} references "
+            f"({run_stats['llm_calls_saved']} LLM calls saved by deduplication) "
+            f"in {run_stats['llm_requests']} LLM requests, {run_stats['cache_hits']} from cache, "
+            f"{run_stats['near_duplicates']} near-duplicates, {run_stats['extractive']} extractive"
+        )
+        if stats is not None:
+            stats.update(run_stats)
+        
+        return all_summaries
+    
+    def summarize(self, retrieved_docs: List[Dict], stats: Optional[Dict] = None, mode: str = "llm") -> List[Dict]:
+        return self.summarize_stream(enumerate(retrieved_docs), stats=stats, mode=mode)
\ No newline at end of file
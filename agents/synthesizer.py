@@ -1,53 +1,119 @@
 import os
 import re  
-from typing import List, Dict
+import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 from pathlib import Path
 from dotenv import load_dotenv
 from langchain_groq import ChatGroq
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib.enums import TA_JUSTIFY, TA_CENTER
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak, HRFlowable
 from datetime import datetime
 
+from .cache import SynthesisCache
+from .compression import compress_summaries
+from .rate_limit import RateLimitedLLM
+from .report_renderer import build_pdf, clean_text_for_pdf, format_equations
+from .tokens import estimate_tokens
+
 load_dotenv()
 
 
+# Section-parallel mode writes each of these with its own LLM call; the
+# instructions mirror the REPORT STRUCTURE of synthesizer_prompt.txt.
+REPORT_SECTIONS = [
+    ("Introduction", "Write 1-2 paragraphs providing context and an overview of the topic."),
+    ("Main Findings", "Write 1-3 paragraphs on the main findings, organized by themes, not by source."),
+    ("Applications", "Write 1-2 paragraphs on practical uses and implementations."),
+    ("Challenges", "Write 1-2 paragraphs on limitations, contradictions, and research gaps."),
+    ("Conclusion", "Write 1-2 paragraphs synthesizing key takeaways and future directions."),
+]
+
+FIRST_SENTENCE_PATTERN = re.compile(r"^(.+?[.!?])(?=\s|$)", re.DOTALL)
+
+SECTION_OUTPUT_TOKENS = 800
+STITCH_OUTPUT_TOKENS = 400
+# Sections mode trims its shared context to fit the rate limit, but writes
+# the report in one pass instead when less than this share would be left.
+MIN_SECTION_CONTEXT_RATIO = 0.5
+
+
 class SynthesizerAgent:
     
-    def __init__(self, model_name: str = "openai/gpt-oss-20b"):
-        self.llm = ChatGroq(
-            model=model_name,
-            temperature=0.4,
-            groq_api_key=os.getenv("GROQ_API_KEY")
+    def __init__(self, model_name: str = "openai/gpt-oss-20b", prompt_token_budget: int = 6000,
+                 partial_token_budget: int = 3000, max_concurrency: int = 4, mode: str = "single",
+                 compression_token_budget: Optional[int] = None,
+                 cache: Optional[SynthesisCache] = None, use_cache: bool = True):
+        self.model_name = model_name
+        self.llm = RateLimitedLLM(
+            ChatGroq(
+                model=model_name,
+                temperature=0.4,
+                groq_api_key=os.getenv("GROQ_API_KEY"),
+                max_retries=0
+            ),
+            model_name,
+            expected_output_tokens=4096
         )
         self.prompt_template = self._load_prompt()
+        self.partial_prompt_template = self._load_prompt("synthesizer_partial.txt")
+        self.section_prompt_template = self._load_prompt("synthesizer_section.txt")
+        self.stitch_prompt_template = self._load_prompt("synthesizer_stitch.txt")
+        
+        # Prompts over prompt_token_budget switch to hierarchical synthesis:
+        # groups of research areas up to partial_token_budget are condensed
+        # in parallel before the final report pass.
+        self.prompt_token_budget = prompt_token_budget
+        self.partial_token_budget = partial_token_budget
+        self.max_concurrency = max_concurrency
+        # "single" writes the report in one generation; "sections" writes the
+        # five sections concurrently and stitches them together.
+        self.mode = mode
+        # Placeholder/error points are always dropped; the rest are ranked
+        # against the topic and only the least relevant are trimmed, down to
+        # this budget. It sits above prompt_token_budget (None means twice
+        # it), so whatever is still too large for one prompt goes through
+        # hierarchical synthesis instead of losing more material.
+        if compression_token_budget is None:
+            compression_token_budget = 2 * prompt_token_budget
+        self.compression_token_budget = compression_token_budget
+        
+        if cache is None and use_cache:
+            cache = SynthesisCache()
+        self.cache = cache
     
-    def _load_prompt(self) -> str:
-        prompt_file = Path(__file__).parent.parent / "prompts" / "synthesizer_prompt.txt"
+    def _load_prompt(self, filename: str = "synthesizer_prompt.txt") -> str:
+        prompt_file = Path(__file__).parent.parent / "prompts" / filename
         return prompt_file.read_text()
     
+    def _prompt_hash(self, mode: str) -> str:
+        # Only the prompts the mode actually uses, so editing one retires
+        # just the reports it produced.
+        templates = [self.partial_prompt_template]
+        if mode == "sections":
+            templates += [self.section_prompt_template, self.stitch_prompt_template]
+        else:
+            templates.append(self.prompt_template)
+        return hashlib.sha256("\x00".join(templates).encode("utf-8")).hexdigest()
+    
+    def _cache_key(self, summaries: List[Dict], topic: str, mode: str) -> str:
+        return SynthesisCache.make_key(
+            self.model_name,
+            self._prompt_hash(mode),
+            mode,
+            topic,
+            summaries,
+            params={
+                "compression_token_budget": self.compression_token_budget,
+                "prompt_token_budget": self.prompt_token_budget,
+                "partial_token_budget": self.partial_token_budget
+            }
+        )
+    
     def _clean_text_for_pdf(self, text: str) -> str:
-        text = text.replace('—', '-')
-        text = text.replace('–', '-')
-        text = text.replace('"', '"').replace('"', '"')
-        text = text.replace(''', "'").replace(''', "'")
-        text = text.replace('\xa0', ' ')
-        text = re.sub(r'\*\*([^*]+)\*\*', r'\1', text)
-        text = re.sub(r'\*([^*]+)\*', r'\1', text)
-        text = re.sub(r'#{1,6}\s*', '', text)
-        text = text.encode('ascii', 'ignore').decode('ascii')
-        
-        return text
+        return clean_text_for_pdf(text)
     
     def _format_equations(self, text: str) -> str:
-        text = re.sub(r'\^(\d+)', r'<super>\1</super>', text)
-        text = re.sub(r'_(\d+)', r'<sub>\1</sub>', text)
-        text = re.sub(r'\^([a-zA-Z])', r'<super>\1</super>', text)
-        text = re.sub(r'_([a-zA-Z])', r'<sub>\1</sub>', text)
-        
-        return text
+        return format_equations(text)
     
     def _format_summaries_for_prompt(self, summaries: List[Dict]) -> str:
         formatted = []
@@ -69,118 +135,263 @@ class SynthesizerAgent:
         
         return "\n".join(formatted)
     
-    def synthesize(self, summaries: List[Dict], topic: str) -> Dict[str, str]:
-        formatted_summaries = self._format_summaries_for_prompt(summaries)
-        
-        prompt = self.prompt_template.format(
+    def _format_areas(self, areas: List[Tuple[str, str]]) -> str:
+        return "\n".join(f"\n=== Research Area: {label} ===\n{text}" for label, text in areas)
+    
+    def _group_areas(self, areas: List[Tuple[str, str]]) -> List[List[Tuple[str, str]]]:
+        groups = []
+        current: List[Tuple[str, str]] = []
+        current_tokens = 0
+        for area in areas:
+            tokens = estimate_tokens(area[1])
+            if current and current_tokens + tokens > self.partial_token_budget:
+                groups.append(current)
+                current = []
+                current_tokens = 0
+            current.append(area)
+            current_tokens += tokens
+        if current:
+            groups.append(current)
+        return groups
+    
+    def _condense_group(self, group: List[Tuple[str, str]], topic: str) -> Tuple[str, str]:
+        areas = ", ".join(label for label, _ in group)
+        prompt = self.partial_prompt_template.format(
             topic=topic,
-            summaries=formatted_summaries
+            areas=areas,
+            summaries=self._format_areas(group)
         )
+        response = self.llm.invoke(prompt, output_tokens=600)
+        return areas, response.content if hasattr(response, 'content') else str(response)
+    
+    def _summaries_context(self, summaries: List[Dict], topic: str) -> str:
+        formatted_summaries = self._format_summaries_for_prompt(summaries)
+        prompt = self.prompt_template.format(topic=topic, summaries=formatted_summaries)
+        if estimate_tokens(prompt) <= self.prompt_token_budget:
+            return formatted_summaries
         
-        try:
-            response = self.llm.invoke(prompt)
-            report_text = response.content if hasattr(response, 'content') else str(response)
-            
-            return {
-                'topic': topic,
-                'report_text': report_text,
-                'generated_at': datetime.now().isoformat()
-            }
+        # Map: condense groups of research areas in parallel. Repeat on the
+        # condensed notes until the final prompt fits the budget.
+        areas = [
+            (item['keyword'], self._format_summaries_for_prompt([item]))
+            for item in summaries
+        ]
+        level = 0
+        while True:
+            context = self._format_areas(areas)
+            prompt = self.prompt_template.format(topic=topic, summaries=context)
+            if estimate_tokens(prompt) <= self.prompt_token_budget or len(areas) <= 1:
+                return context
             
-        except Exception as e:
-            return {
-                'topic': topic,
-                'report_text': f"Error generating synthesis: {str(e)}",
-                'generated_at': datetime.now().isoformat()
-            }
+            groups = self._group_areas(areas)
+            if len(groups) == len(areas) and level > 0:
+                # Notes no longer shrink when regrouped; send what we have.
+                return context
+            level += 1
+            print(f"  Hierarchical synthesis level {level}: condensing {len(areas)} areas in {len(groups)} groups")
+            with ThreadPoolExecutor(max_workers=min(len(groups), self.max_concurrency)) as executor:
+                areas = list(executor.map(lambda group: self._condense_group(group, topic), groups))
     
-    def generate_pdf(self, synthesis: Dict[str, str], output_path: str):
-        doc = SimpleDocTemplate(
-            output_path,
-            pagesize=letter,
-            rightMargin=72,
-            leftMargin=72,
-            topMargin=72,
-            bottomMargin=18
-        )
-        
-        styles = getSampleStyleSheet()
-        
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            textColor='#1a1a1a',
-            spaceAfter=30,
-            alignment=TA_CENTER,
-            fontName='Helvetica-Bold'
+    def _section_prompt(self, section: str, instructions: str, context: str, topic: str) -> str:
+        return self.section_prompt_template.format(
+            topic=topic,
+            summaries=context,
+            section=section,
+            instructions=instructions,
+            other_sections=", ".join(name for name, _ in REPORT_SECTIONS if name != section)
         )
+    
+    def _section_context(self, summaries: List[Dict], topic: str) -> Optional[str]:
+        # Every section call carries the whole context, so the five calls
+        # plus the stitch only run concurrently if together they fit the
+        # model's per-minute token budget; past it the rate limiter spaces
+        # them a window apart and sections mode is far slower than a single
+        # pass. Trim the shared context to fit, or return None when too
+        # little of it would be left.
+        limiter = getattr(self.llm, "limiter", None)
+        if limiter is None:
+            return self._summaries_context(summaries, topic)
         
-        body_style = ParagraphStyle(
-            'CustomBody',
-            parent=styles['BodyText'],
-            fontSize=11,
-            leading=16,
-            alignment=TA_JUSTIFY,
-            spaceAfter=12,
-            fontName='Times-Roman'
+        section_overhead = max(
+            estimate_tokens(self._section_prompt(section, instructions, "", topic))
+            for section, instructions in REPORT_SECTIONS
+        ) + SECTION_OUTPUT_TOKENS
+        stitch_tokens = (
+            estimate_tokens(self.stitch_prompt_template)
+            + 150 * (len(REPORT_SECTIONS) - 1)
+            + STITCH_OUTPUT_TOKENS
         )
+        budget = (limiter.tpm - stitch_tokens) // len(REPORT_SECTIONS) - section_overhead
         
-        subtitle_style = ParagraphStyle(
-            'CustomSubtitle',
-            parent=styles['Normal'],
-            fontSize=10,
-            textColor='#666666',
-            spaceAfter=20,
-            alignment=TA_CENTER,
-            fontName='Helvetica'
-        )
+        tokens = estimate_tokens(self._format_summaries_for_prompt(summaries))
+        if tokens <= budget:
+            return self._summaries_context(summaries, topic)
+        if budget < tokens * MIN_SECTION_CONTEXT_RATIO:
+            return None
         
-        heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=styles['Heading2'],
-            fontSize=14,
-            textColor='#1a1a1a',
-            spaceAfter=12,
-            spaceBefore=16,
-            fontName='Helvetica-Bold'
+        trimmed = self._format_summaries_for_prompt(compress_summaries(summaries, topic, token_budget=budget))
+        print(
+            f"  Sections mode: trimming shared context {tokens} -> {estimate_tokens(trimmed)} tokens "
+            f"to fit {limiter.tpm} TPM"
         )
+        return trimmed
+    
+    def _write_section(self, section: str, instructions: str, context: str, topic: str) -> str:
+        prompt = self._section_prompt(section, instructions, context, topic)
+        response = self.llm.invoke(prompt, output_tokens=SECTION_OUTPUT_TOKENS)
+        text = (response.content if hasattr(response, 'content') else str(response)).strip()
         
-        story = []
+        # Drop a heading the model added despite the instructions; the
+        # stitched report adds its own.
+        first_line, _, rest = text.partition("\n")
+        if first_line.strip().strip('#*: ').lower() == section.lower():
+            text = rest.strip()
+        return text
+    
+    def _stitch_sections(self, sections: List[Tuple[str, str]], topic: str) -> List[Tuple[str, str]]:
+        # One small call rewrites the first sentence of each later section so
+        # it follows on from the previous one. Any failure keeps the sections
+        # as written, which still form a complete report.
+        boundaries = []
+        for (previous_name, previous_text), (name, text) in zip(sections, sections[1:]):
+            match = FIRST_SENTENCE_PATTERN.match(text)
+            if not match:
+                continue
+            boundaries.append(
+                f"Before {name}:\n"
+                f"End of {previous_name}: {previous_text[-400:]}\n"
+                f"First sentence of {name}: {match.group(1)}"
+            )
+        if not boundaries:
+            return sections
         
-        title = Paragraph(f"Research Report:<br/>{synthesis['topic']}", title_style)
-        story.append(title)
+        prompt = self.stitch_prompt_template.format(topic=topic, boundaries="\n\n".join(boundaries))
+        try:
+            response = self.llm.invoke(prompt, output_tokens=STITCH_OUTPUT_TOKENS)
+            response_text = response.content if hasattr(response, 'content') else str(response)
+            match = re.search(r"\{.*\}", response_text, re.DOTALL)
+            rewrites = json.loads(match.group(0)) if match else {}
+        except Exception as e:
+            print(f"  Stitching pass failed ({e}), joining sections as written")
+            return sections
+        if not isinstance(rewrites, dict):
+            return sections
         
-        date_str = datetime.now().strftime("%B %d, %Y")
-        subtitle = Paragraph(f"Generated on {date_str}", subtitle_style)
-        story.append(subtitle)
-        story.append(Spacer(1, 0.2*inch))
+        stitched = [sections[0]]
+        for name, text in sections[1:]:
+            rewrite = rewrites.get(name)
+            if isinstance(rewrite, str) and rewrite.strip():
+                text = FIRST_SENTENCE_PATTERN.sub(lambda _: rewrite.strip(), text, count=1)
+            stitched.append((name, text))
+        return stitched
+    
+    def _stream_sections(self, context: str, topic: str) -> Iterator[str]:
+        with ThreadPoolExecutor(max_workers=len(REPORT_SECTIONS)) as executor:
+            futures = [
+                executor.submit(self._write_section, section, instructions, context, topic)
+                for section, instructions in REPORT_SECTIONS
+            ]
+            sections = [(section, future.result()) for (section, _), future in zip(REPORT_SECTIONS, futures)]
         
-        story.append(HRFlowable(width="100%", thickness=1, color='#cccccc'))
-        story.append(Spacer(1, 0.3*inch))
+        sections = self._stitch_sections(sections, topic)
+        for i, (section, text) in enumerate(sections):
+            yield ("\n\n" if i else "") + f"{section}\n\n{text}"
+    
+    def _compress(self, summaries: List[Dict], topic: str, stats: Optional[Dict] = None) -> List[Dict]:
+        compressed = compress_summaries(summaries, topic, token_budget=self.compression_token_budget)
         
-        report_text = self._clean_text_for_pdf(synthesis['report_text'])
-        paragraphs = report_text.split('\n\n')
+        tokens_before = estimate_tokens(self._format_summaries_for_prompt(summaries))
+        tokens_after = estimate_tokens(self._format_summaries_for_prompt(compressed))
+        compression_stats = {
+            "tokens_before": tokens_before,
+            "tokens_after": tokens_after,
+            "tokens_removed": tokens_before - tokens_after,
+            "points_before": sum(len(s['key_points']) for item in summaries for s in item['summaries']),
+            "points_after": sum(len(s['key_points']) for item in compressed for s in item['summaries'])
+        }
+        print(
+            f"  Prompt compression: {tokens_before} -> {tokens_after} tokens "
+            f"({compression_stats['tokens_removed']} removed, "
+            f"{compression_stats['points_before'] - compression_stats['points_after']} key points dropped)"
+        )
+        if stats is not None:
+            stats.update(compression_stats)
         
-        for para_text in paragraphs:
-            if para_text.strip():
-                is_heading = (
-                para_text.strip() in ['Introduction', 'Main Findings', 'Applications', 'Challenges', 'Conclusion'] or
-                para_text.strip().isupper() or
-                (len(para_text.strip()) < 50 and ':' not in para_text))
+        return compressed
     
-                if is_heading:
-                    heading_text = para_text.strip()
-                    heading = Paragraph(heading_text, heading_style)
-                    story.append(heading)
-                else:
-                    formatted_para = self._format_equations(para_text.strip())
-                    para = Paragraph(formatted_para, body_style)
-                    story.append(para)
+    def stream_synthesis(self, summaries: List[Dict], topic: str, mode: Optional[str] = None,
+                         stats: Optional[Dict] = None) -> Iterator[str]:
+        mode = mode or self.mode
+        if mode not in ("single", "sections"):
+            raise ValueError(f"Unknown synthesis mode: {mode}")
         
-        story.append(Spacer(1, 0.5*inch))
+        if stats is not None:
+            stats["mode"] = mode
+        summaries = self._compress(summaries, topic, stats=stats)
+        if mode == "sections":
+            context = self._section_context(summaries, topic)
+            if context is not None:
+                yield from self._stream_sections(context, topic)
+                return
+            print("  Sections mode would exceed the model's token rate limit; writing the report in one pass")
+            if stats is not None:
+                stats["mode"] = "single"
         
+        context = self._summaries_context(summaries, topic)
+        
+        # Reduce: the final pass always uses the regular report prompt, so
+        # the five-section structure is the same in every mode.
+        prompt = self.prompt_template.format(topic=topic, summaries=context)
+        for chunk in self.llm.stream(prompt):
+            text = chunk.content if hasattr(chunk, 'content') else str(chunk)
+            if text:
+                yield text
+    
+    def synthesize(self, summaries: List[Dict], topic: str,
+                   on_chunk: Optional[Callable[[str], None]] = None, mode: Optional[str] = None,
+                   stats: Optional[Dict] = None) -> Dict[str, str]:
+        # Streams the report so on_chunk sees text as soon as the model
+        # produces it; the full report is still returned at the end.
         try:
-            doc.build(story)
+            mode = mode or self.mode
+            cache_key = None
+            if self.cache is not None and mode in ("single", "sections"):
+                cache_key = self._cache_key(summaries, topic, mode)
+                cached = self.cache.lookup(cache_key)
+                if stats is not None:
+                    stats["cache"] = "hit" if cached is not None else "miss"
+                if cached is not None:
+                    print(f"  Synthesis cache hit for '{topic}'")
+                    if on_chunk is not None:
+                        on_chunk(cached['report_text'])
+                    return {**cached, 'topic': topic}
+            
+            parts = []
+            for text in self.stream_synthesis(summaries, topic, mode=mode, stats=stats):
+                parts.append(text)
+                if on_chunk is not None:
+                    on_chunk(text)
+            report_text = "".join(parts)
+            
+            synthesis = {
+                'topic': topic,
+                'report_text': report_text,
+                'generated_at': datetime.now().isoformat()
+            }
+            if cache_key is not None and report_text.strip():
+                self.cache.store(cache_key, synthesis)
+            return synthesis
+            
         except Exception as e:
-            raise
\ No newline at end of file
+            # Chunks may already have gone out through on_chunk; the error
+            # in stats lets callers tell them apart from a finished report.
+            if stats is not None:
+                stats["error"] = str(e)
+            return {
+                'topic': topic,
+                'report_text': f"Error generating synthesis: {str(e)}",
+                'generated_at': datetime.now().isoformat()
+            }
+    
+    def generate_pdf(self, synthesis: Dict[str, str], output_path: str):
+        build_pdf(synthesis, output_path)
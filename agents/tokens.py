@@ -0,0 +1,69 @@
+import re
+import math
+from typing import List
+
+
+# Groq does not expose its tokenizer; roughly four characters per token holds
+# well enough for English prose to size prompts against a budget.
+CHARS_PER_TOKEN = 4
+
+PARAGRAPH_PATTERN = re.compile(r"\n\s*\n")
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(\[])")
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Shared by the extractive summarizer and prompt compression, so both rank
+# text by the same content words.
+STOPWORDS = frozenset(
+    "a an and are as at be been but by can for from has have in into is it its of on or "
+    "that the their these this those to was were which while with we our using used".split()
+)
+
+
+def estimate_tokens(text: str) -> int:
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def content_words(text: str) -> List[str]:
+    return [word for word in WORD_PATTERN.findall(text.lower()) if word not in STOPWORDS]
+
+
+def _split_units(text: str, max_tokens: int) -> List[str]:
+    # Paragraphs first, then sentences, then a hard cut for run-on text, so
+    # every unit fits in a chunk on its own.
+    units = []
+    for paragraph in PARAGRAPH_PATTERN.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if estimate_tokens(paragraph) <= max_tokens:
+            units.append(paragraph)
+            continue
+        for sentence in SENTENCE_PATTERN.split(paragraph):
+            if estimate_tokens(sentence) <= max_tokens:
+                units.append(sentence)
+                continue
+            step = max_tokens * CHARS_PER_TOKEN
+            units.extend(sentence[i:i + step] for i in range(0, len(sentence), step))
+    return units
+
+
+def split_text(text: str, max_tokens: int) -> List[str]:
+    if estimate_tokens(text) <= max_tokens:
+        return [text]
+
+    chunks = []
+    current: List[str] = []
+    current_tokens = 0
+    for unit in _split_units(text, max_tokens):
+        unit_tokens = estimate_tokens(unit)
+        if current and current_tokens + unit_tokens > max_tokens:
+            chunks.append("\n\n".join(current))
+            current = []
+            current_tokens = 0
+        current.append(unit)
+        current_tokens += unit_tokens
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
@@ -6,17 +6,23 @@ from pathlib import Path
 load_dotenv(dotenv_path=Path(__file__).parent / ".env")
 
 import os
-import io
+import json
 import uuid
+import queue
+import asyncio
 import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from enum import Enum
-from typing import Dict, List, Optional
+from typing import Dict, List, Literal, Optional
 from datetime import datetime
 from types import SimpleNamespace
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Header, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 
 from langsmith.run_helpers import trace
@@ -25,6 +31,8 @@ from agents.planner import PlannerAgent
 from agents.retriever import RetrieverAgent
 from agents.summarizer import SummarizerAgent
 from agents.synthesizer import SynthesizerAgent
+from agents.rate_limit import rate_limit_stats
+from agents.report_renderer import iter_html, iter_markdown, render_pdf_bytes, synthesis_hash, warm_up
 from backend.evals import ResearchAgentEvaluator
 
 app = FastAPI(title="Research Planner Agent API")
@@ -45,6 +53,64 @@ evaluator = ResearchAgentEvaluator()
 jobs_lock = threading.Lock()
 jobs: Dict[str, dict] = {}
 
+# How often an open report stream checks its job for new text.
+REPORT_STREAM_POLL_SECONDS = 0.1
+REPORT_STREAM_KEEPALIVE_SECONDS = 15
+
+
+# ReportLab is CPU-bound, so PDFs are rendered in worker processes that
+# build the stylesheet once at startup. Rendered bytes are cached by the
+# synthesis content hash, and in-flight renders are shared.
+def create_pdf_pool() -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(
+        max_workers=int(os.getenv("PDF_WORKERS", "2")),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=warm_up
+    )
+
+
+pdf_pool = create_pdf_pool()
+PDF_CACHE_ENTRIES = 64
+pdf_lock = threading.Lock()
+pdf_cache: "OrderedDict[str, bytes]" = OrderedDict()
+pdf_renders: Dict[str, Future] = {}
+
+
+def render_pdf(synthesis: dict) -> Future:
+    global pdf_pool
+    key = synthesis_hash(synthesis)
+    with pdf_lock:
+        if key in pdf_cache:
+            pdf_cache.move_to_end(key)
+            future = Future()
+            future.set_result(pdf_cache[key])
+            return future
+        if key in pdf_renders:
+            return pdf_renders[key]
+
+        try:
+            future = pdf_pool.submit(render_pdf_bytes, synthesis)
+        except BrokenProcessPool:
+            # A worker died (OOM, crash) and took the pool down with it;
+            # replace it rather than failing every render from now on.
+            print("PDF worker pool is broken; starting a new one")
+            pdf_pool.shutdown(wait=False, cancel_futures=True)
+            pdf_pool = create_pdf_pool()
+            future = pdf_pool.submit(render_pdf_bytes, synthesis)
+        pdf_renders[key] = future
+
+    def store(done: Future):
+        with pdf_lock:
+            pdf_renders.pop(key, None)
+            if done.cancelled() or done.exception() is not None:
+                return
+            pdf_cache[key] = done.result()
+            while len(pdf_cache) > PDF_CACHE_ENTRIES:
+                pdf_cache.popitem(last=False)
+
+    future.add_done_callback(store)
+    return future
+
 
 def log_feedback(run_id, feedback_dict):
     if run_id is None:
@@ -73,6 +139,11 @@ class JobStage(str, Enum):
 
 class SubmitRequest(BaseModel):
     topic: str
+    # "extractive" summarizes locally without the LLM, for low-priority jobs
+    # or when Groq is saturated.
+    summary_mode: Literal["llm", "extractive"] = "llm"
+    # "sections" writes the five report sections concurrently.
+    synthesis_mode: Literal["single", "sections"] = "single"
 
 
 class SubmitResponse(BaseModel):
@@ -122,6 +193,8 @@ class ResultResponse(BaseModel):
     stage: JobStage
     report_text: Optional[str] = None
     generated_at: Optional[str] = None
+    synthesis_stats: Optional[dict] = None
+    synthesis_cache: Optional[str] = None
 
 
 def get_job_or_404(job_id: str) -> dict:
@@ -137,37 +210,61 @@ def run_pipeline_background(job_id: str):
         job = jobs[job_id]
         topic = job["topic"]
         keywords = job["keywords"]
+        summary_mode = job["summary_mode"]
+        synthesis_mode = job["synthesis_mode"]
         job["stage"] = JobStage.RETRIEVING
 
     try:
-        with trace(name="retriever_stage", run_type="chain", inputs={"keywords": keywords}) as rt:
-            retrieval_results = retriever.retrieve(keywords)
-
-            all_sources = []
-            for r in retrieval_results:
-                if r['wikipedia']['title']:
-                    all_sources.append(r['wikipedia'])
-                all_sources.extend(r['arxiv_papers'])
+        # Retrieval runs in its own thread and hands each keyword's result to
+        # the summarizer as soon as it lands, so the two stages overlap.
+        retrieved: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        retrieval_results: List[Optional[dict]] = [None] * len(keywords)
+        retrieval_state = {"run_id": None, "sources": [], "error": None}
+
+        def produce_retrieval():
+            try:
+                with trace(name="retriever_stage", run_type="chain", inputs={"keywords": keywords}) as rt:
+                    for index, result in retriever.retrieve_stream(keywords):
+                        retrieval_results[index] = result
+                        retrieved.put((index, result))
+
+                    all_sources = []
+                    for r in retrieval_results:
+                        if r['wikipedia']['title']:
+                            all_sources.append(r['wikipedia'])
+                        all_sources.extend(r['arxiv_papers'])
+
+                    rt.end(outputs={"sources": all_sources})
+                    retrieval_state["run_id"] = rt.id
+                    retrieval_state["sources"] = all_sources
+
+                with jobs_lock:
+                    job["retrieval_results"] = retrieval_results
+                    job["stage"] = JobStage.SUMMARIZING
+            except Exception as e:
+                retrieval_state["error"] = e
+            finally:
+                retrieved.put(None)
+
+        producer = threading.Thread(target=produce_retrieval, daemon=True)
+        producer.start()
 
-            rt.end(outputs={"sources": all_sources})
-            retriever_run_id = rt.id
+        with trace(name="summarizer_stage", run_type="chain", inputs={"retrieval_results": "omitted_for_brevity"}) as rt:
+            summary_stats = {}
+            summaries = summarizer.summarize_stream(iter(retrieved.get, None), stats=summary_stats, mode=summary_mode)
+            producer.join()
+            if retrieval_state["error"] is not None:
+                raise retrieval_state["error"]
+            rt.end(outputs={"summaries": summaries, "stats": summary_stats})
+            summarizer_run_id = rt.id
 
         fake_example = SimpleNamespace(inputs={"keywords": keywords})
-        fake_run = SimpleNamespace(outputs={"sources": all_sources})
+        fake_run = SimpleNamespace(outputs={"sources": retrieval_state["sources"]})
 
         quality_feedback = evaluator.source_quality_evaluator(fake_run, fake_example)
         diversity_feedback = evaluator.source_diversity_evaluator(fake_run, fake_example)
-        log_feedback(retriever_run_id, quality_feedback)
-        log_feedback(retriever_run_id, diversity_feedback)
-
-        with jobs_lock:
-            job["retrieval_results"] = retrieval_results
-            job["stage"] = JobStage.SUMMARIZING
-
-        with trace(name="summarizer_stage", run_type="chain", inputs={"retrieval_results": "omitted_for_brevity"}) as rt:
-            summaries = summarizer.summarize(retrieval_results)
-            rt.end(outputs={"summaries": summaries})
-            summarizer_run_id = rt.id
+        log_feedback(retrieval_state["run_id"], quality_feedback)
+        log_feedback(retrieval_state["run_id"], diversity_feedback)
 
         first_summary_for_eval = None
         for item in summaries:
@@ -187,11 +284,19 @@ def run_pipeline_background(job_id: str):
 
         with jobs_lock:
             job["summaries"] = summaries
+            job["summary_stats"] = summary_stats
             job["stage"] = JobStage.SYNTHESIZING
 
+        def publish_chunk(text: str):
+            with jobs_lock:
+                job["report_chunks"].append(text)
+
         with trace(name="synthesizer_stage", run_type="chain", inputs={"topic": topic}) as rt:
-            synthesis = synthesizer.synthesize(summaries, topic)
-            rt.end(outputs={"report_text": synthesis["report_text"]})
+            synthesis_stats = {}
+            synthesis = synthesizer.synthesize(
+                summaries, topic, on_chunk=publish_chunk, mode=synthesis_mode, stats=synthesis_stats
+            )
+            rt.end(outputs={"report_text": synthesis["report_text"], "stats": synthesis_stats})
             synthesizer_run_id = rt.id
 
         fake_example = SimpleNamespace(inputs={"topic": topic})
@@ -205,8 +310,18 @@ def run_pipeline_background(job_id: str):
         log_feedback(synthesizer_run_id, relevance_feedback)
         log_feedback(synthesizer_run_id, structure_feedback)
 
+        # Start rendering now so the first download is already cached. This
+        # is only a head start; a failure here must not fail the job.
+        try:
+            render_pdf(synthesis)
+        except Exception as e:
+            print(f"PDF pre-render failed: {e}")
+
         with jobs_lock:
             job["synthesis"] = synthesis
+            job["synthesis_stats"] = synthesis_stats
+            job["synthesis_cache"] = synthesis_stats.get("cache")
+            job["error"] = synthesis_stats.get("error")
             job["stage"] = JobStage.COMPLETED
 
     except Exception as e:
@@ -241,10 +356,16 @@ def submit_topic(request: SubmitRequest):
             "topic": request.topic,
             "keywords": result["keywords"],
             "retry_count": 0,
+            "summary_mode": request.summary_mode,
+            "synthesis_mode": request.synthesis_mode,
             "stage": JobStage.KEYWORDS_GENERATED,
             "retrieval_results": None,
             "summaries": None,
+            "summary_stats": None,
             "synthesis": None,
+            "synthesis_stats": None,
+            "synthesis_cache": None,
+            "report_chunks": [],
             "error": None,
             "created_at": datetime.now().isoformat()
         }
@@ -371,7 +492,7 @@ def get_summaries(job_id: str):
     if job["summaries"] is None:
         raise HTTPException(status_code=400, detail="Summaries not available yet")
 
-    return {"job_id": job_id, "summaries": job["summaries"]}
+    return {"job_id": job_id, "summaries": job["summaries"], "summary_stats": job.get("summary_stats")}
 
 
 @app.get("/jobs/{job_id}/result", response_model=ResultResponse)
@@ -388,12 +509,150 @@ def get_result(job_id: str):
         topic=job["topic"],
         stage=job["stage"],
         report_text=synthesis["report_text"],
-        generated_at=synthesis["generated_at"]
+        generated_at=synthesis["generated_at"],
+        synthesis_stats=job.get("synthesis_stats"),
+        synthesis_cache=job.get("synthesis_cache")
+    )
+
+
+def _sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.get("/jobs/{job_id}/report/stream")
+def stream_report(job_id: str):
+    job = get_job_or_404(job_id)
+
+    async def events():
+        # Replays whatever has been generated so far, then follows the
+        # synthesizer until the job completes or fails. Waiting happens on
+        # the event loop, so an open stream never holds a worker thread.
+        loop = asyncio.get_running_loop()
+        sent = 0
+        last_event = loop.time()
+        while True:
+            with jobs_lock:
+                chunks = job["report_chunks"][sent:]
+                stage = job["stage"]
+                error = job["error"]
+                # "done" promises the streamed text is the stored report; a
+                # synthesis that failed part-way leaves them different.
+                streamed_report = (
+                    stage == JobStage.COMPLETED
+                    and "".join(job["report_chunks"]) == job["synthesis"]["report_text"]
+                )
+            sent += len(chunks)
+
+            if chunks:
+                yield _sse_event("chunk", {"text": "".join(chunks)})
+                last_event = loop.time()
+            elif stage == JobStage.COMPLETED and streamed_report:
+                yield _sse_event("done", {"job_id": job_id, "stage": stage.value})
+                return
+            elif stage in (JobStage.COMPLETED, JobStage.FAILED):
+                yield _sse_event("error", {"job_id": job_id, "error": error or "Report generation failed"})
+                return
+            elif loop.time() - last_event >= REPORT_STREAM_KEEPALIVE_SECONDS:
+                # Comment line; keeps proxies from closing an idle stream.
+                yield ": keep-alive\n\n"
+                last_event = loop.time()
+
+            await asyncio.sleep(REPORT_STREAM_POLL_SECONDS)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+# Media types served by /jobs/{job_id}/report, in order of preference when
+# the client accepts several equally.
+REPORT_FORMATS = OrderedDict([
+    ("text/markdown", "markdown"),
+    ("text/html", "html"),
+    ("text/plain", "markdown"),
+])
+
+
+def negotiate_report_format(accept: Optional[str]) -> Optional[str]:
+    # Returns the media type to serve, or None when nothing offered is
+    # acceptable. A missing header accepts anything.
+    ranges = []
+    for part in (accept or "*/*").split(","):
+        fields = [field.strip() for field in part.split(";")]
+        media_range = fields[0].lower()
+        if not media_range:
+            continue
+        quality = 1.0
+        for param in fields[1:]:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        ranges.append((media_range, quality))
+
+    best, best_quality = None, 0.0
+    for media_type in REPORT_FORMATS:
+        main_type = media_type.split("/")[0]
+        # The most specific matching range decides the quality.
+        quality, specificity = 0.0, -1
+        for media_range, range_quality in ranges:
+            if media_range == media_type:
+                match = 2
+            elif media_range == f"{main_type}/*":
+                match = 1
+            elif media_range == "*/*":
+                match = 0
+            else:
+                continue
+            if match > specificity:
+                quality, specificity = range_quality, match
+        if quality > best_quality:
+            best, best_quality = media_type, quality
+    return best
+
+
+@app.get("/jobs/{job_id}/report")
+def get_report(
+    job_id: str,
+    format: Optional[Literal["html", "markdown"]] = Query(default=None),
+    accept: Optional[str] = Header(default=None)
+):
+    job = get_job_or_404(job_id)
+
+    if format is not None:
+        media_type = "text/html" if format == "html" else "text/markdown"
+    else:
+        media_type = negotiate_report_format(accept)
+        if media_type is None:
+            raise HTTPException(
+                status_code=406,
+                detail=f"Report is available as: {', '.join(REPORT_FORMATS)}"
+            )
+
+    with jobs_lock:
+        stage = job["stage"]
+        if stage == JobStage.COMPLETED:
+            synthesis = job["synthesis"]
+        else:
+            # A preview of the report written so far while synthesis runs.
+            synthesis = {"topic": job["topic"], "report_text": "".join(job["report_chunks"])}
+    if stage != JobStage.COMPLETED and not synthesis["report_text"]:
+        raise HTTPException(status_code=400, detail=f"Report not available yet. Current stage: {stage}")
+
+    renderer = iter_html if REPORT_FORMATS[media_type] == "html" else iter_markdown
+    return StreamingResponse(
+        renderer(synthesis),
+        media_type=f"{media_type}; charset=utf-8",
+        headers={"Vary": "Accept", "X-Report-Complete": str(stage == JobStage.COMPLETED).lower()}
     )
 
 
 @app.get("/jobs/{job_id}/pdf")
-def get_pdf(job_id: str):
+async def get_pdf(job_id: str):
     job = get_job_or_404(job_id)
 
     if job["stage"] != JobStage.COMPLETED:
@@ -402,10 +661,13 @@ def get_pdf(job_id: str):
     safe_filename = "".join(c for c in job["topic"] if c.isalnum() or c in (' ', '-', '_')).strip()
     safe_filename = safe_filename.replace(' ', '_')[:50]
 
-    buffer = io.BytesIO()
-    synthesizer.generate_pdf(job["synthesis"], buffer)
-    pdf_bytes = buffer.getvalue()
-    buffer.close()
+    # Awaiting the worker process keeps the event loop and API threads free.
+    try:
+        pdf_bytes = await asyncio.wrap_future(render_pdf(job["synthesis"]))
+    except BrokenProcessPool:
+        # The render was in flight when a worker died; the next call runs
+        # on a fresh pool.
+        pdf_bytes = await asyncio.wrap_future(render_pdf(job["synthesis"]))
 
     return Response(
         content=pdf_bytes,
@@ -414,6 +676,11 @@ def get_pdf(job_id: str):
     )
 
 
+@app.get("/rate-limits")
+def get_rate_limits():
+    return {"models": rate_limit_stats()}
+
+
 @app.get("/health")
 def health_check():
     return {"status": "ok", "timestamp": datetime.now().isoformat()}
\ No newline at end of file
@@ -14,6 +14,7 @@ from agents.planner import PlannerAgent
 from agents.retriever import RetrieverAgent
 from agents.summarizer import SummarizerAgent
 from agents.synthesizer import SynthesizerAgent
+from agents.rate_limit import RateLimitedLLM
 
 load_dotenv()
 
@@ -25,10 +26,15 @@ class ResearchAgentEvaluator:
     
     def __init__(self):
         self.client = Client()
-        self.judge_llm = ChatGroq(
-            model="openai/gpt-oss-120b",
-            temperature=0.1,
-            api_key=os.getenv("GROQ_API_KEY")
+        self.judge_llm = RateLimitedLLM(
+            ChatGroq(
+                model="openai/gpt-oss-120b",
+                temperature=0.1,
+                api_key=os.getenv("GROQ_API_KEY"),
+                max_retries=0
+            ),
+            "openai/gpt-oss-120b",
+            expected_output_tokens=256
         )
         
         self.planner = PlannerAgent()
@@ -0,0 +1,137 @@
+"""Micro-benchmark: streaming Atom parser vs the old split-based arXiv parser.
+
+Usage (from the project root):
+    python -m benchmarks.bench_arxiv_parser [--feed recorded.xml] [--entries 100]
+
+Without --feed an arXiv-shaped feed with the requested number of entries is
+generated, mirroring the structure export.arxiv.org returns. Record a real
+one with e.g.
+    curl -o feed.xml "http://export.arxiv.org/api/query?search_query=all:transformer&max_results=100"
+"""
+import argparse
+import timeit
+import tracemalloc
+from typing import Dict, List
+
+from agents.atom_parser import iter_arxiv_entries
+
+
+def legacy_parse(xml_text: str) -> List[Dict]:
+    papers = []
+    entries = xml_text.split('<entry>')
+
+    for entry in entries[1:]:
+        title_start = entry.find('<title>') + 7
+        title_end = entry.find('</title>')
+        title = entry[title_start:title_end].strip() if title_start > 6 else ""
+
+        summary_start = entry.find('<summary>') + 9
+        summary_end = entry.find('</summary>')
+        summary = entry[summary_start:summary_end].strip() if summary_start > 8 else ""
+
+        id_start = entry.find('<id>') + 4
+        id_end = entry.find('</id>')
+        paper_url = entry[id_start:id_end].strip() if id_start > 3 else ""
+
+        published_start = entry.find('<published>') + 11
+        published_end = entry.find('</published>')
+        published = entry[published_start:published_end].strip()[:10] if published_start > 10 else ""
+
+        if title and summary:
+            papers.append({
+                "source": "arxiv",
+                "title": title,
+                "url": paper_url,
+                "published": published,
+                "abstract": summary
+            })
+
+    return papers
+
+
+def build_feed(entries: int) -> str:
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<feed xmlns="http://www.w3.org/2005/Atom">\n'
+        '  <link href="http://arxiv.org/api/query" rel="self" type="application/atom+xml"/>\n'
+        '  <title type="html">ArXiv Query: search_query=all:transformer</title>\n'
+        '  <id>http://arxiv.org/api/benchmark</id>\n'
+        '  <updated>2024-01-01T00:00:00-05:00</updated>\n'
+        f'  <opensearch:totalResults xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/">{entries}</opensearch:totalResults>\n'
+    ]
+    abstract = (
+        "  We study attention-based sequence models &amp; their scaling behaviour. "
+        "Our method reduces the quadratic cost of self-attention while matching "
+        "the accuracy of dense transformers on language modelling, translation "
+        "and long-range benchmarks. Experiments on 12 datasets show consistent "
+        "gains of 1.5-3.0 BLEU with 40% less memory.\n" * 3
+    )
+    for i in range(entries):
+        arxiv_id = f"2401.{i:05d}v1"
+        authors = "".join(f"    <author>\n      <name>Author {i}-{j}</name>\n    </author>\n" for j in range(4))
+        parts.append(
+            "  <entry>\n"
+            f"    <id>http://arxiv.org/abs/{arxiv_id}</id>\n"
+            "    <updated>2024-01-02T10:00:00Z</updated>\n"
+            "    <published>2024-01-01T10:00:00Z</published>\n"
+            f"    <title>Efficient Attention Mechanisms for\n  Long Sequences, Part {i}</title>\n"
+            f"    <summary>{abstract}</summary>\n"
+            f"{authors}"
+            '    <arxiv:comment xmlns:arxiv="http://arxiv.org/schemas/atom">12 pages, 4 figures</arxiv:comment>\n'
+            f'    <link href="http://arxiv.org/abs/{arxiv_id}" rel="alternate" type="text/html"/>\n'
+            f'    <link title="pdf" href="http://arxiv.org/pdf/{arxiv_id}" rel="related" type="application/pdf"/>\n'
+            '    <arxiv:primary_category xmlns:arxiv="http://arxiv.org/schemas/atom" term="cs.CL" scheme="http://arxiv.org/schemas/atom"/>\n'
+            '    <category term="cs.CL" scheme="http://arxiv.org/schemas/atom"/>\n'
+            '    <category term="cs.LG" scheme="http://arxiv.org/schemas/atom"/>\n'
+            "  </entry>\n"
+        )
+    parts.append("</feed>\n")
+    return "".join(parts)
+
+
+def chunked(data: bytes, size: int = 16384):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+def streaming_parse(data: bytes) -> List[Dict]:
+    return list(iter_arxiv_entries(chunked(data)))
+
+
+def peak_memory(func, *args) -> int:
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--feed", help="Path to a recorded arXiv Atom feed")
+    parser.add_argument("--entries", type=int, default=100, help="Entries in the generated feed")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.feed:
+        with open(args.feed, "rb") as f:
+            data = f.read()
+    else:
+        data = build_feed(args.entries).encode("utf-8")
+    text = data.decode("utf-8")
+
+    legacy_count = len(legacy_parse(text))
+    streaming_count = len(streaming_parse(data))
+
+    legacy_time = min(timeit.repeat(lambda: legacy_parse(text), number=1, repeat=args.repeat))
+    streaming_time = min(timeit.repeat(lambda: streaming_parse(data), number=1, repeat=args.repeat))
+
+    print(f"Feed: {len(data) / 1024:.1f} KiB, {streaming_count} entries (legacy parsed {legacy_count})")
+    print(f"{'parser':<12}{'best time':>14}{'peak memory':>16}")
+    print(f"{'legacy':<12}{legacy_time * 1000:>11.2f} ms{peak_memory(legacy_parse, text) / 1024:>12.1f} KiB")
+    print(f"{'streaming':<12}{streaming_time * 1000:>11.2f} ms{peak_memory(streaming_parse, data) / 1024:>12.1f} KiB")
+    print("Streaming also extracts authors, categories, updated date and PDF link.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,9 @@
+import os
+import tempfile
+
+# Agents read these at import and construction time; tests never reach the
+# real APIs and must not share the developer's on-disk caches.
+os.environ.setdefault("GROQ_API_KEY", "test")
+os.environ.setdefault("GOOGLE_API_KEY", "test")
+os.environ.setdefault("LANGCHAIN_TRACING_V2", "false")
+os.environ.setdefault("RESEARCH_CACHE_DIR", tempfile.mkdtemp(prefix="research-cache-"))
@@ -0,0 +1,167 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from agents.rate_limit import ModelRateLimiter, RateLimitedLLM
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+def wake(limiter: ModelRateLimiter):
+    # Waiters sleep on real time; after moving the fake clock, make them
+    # re-check it straight away.
+    with limiter._cond:
+        limiter._cond.notify_all()
+
+
+def wait_until(predicate, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached")
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def test_requests_per_minute(clock):
+    limiter = ModelRateLimiter(rpm=2, tpm=10**6, clock=clock)
+    limiter.acquire(1)
+    clock.advance(10)
+    limiter.acquire(1)
+    assert limiter._delay(clock(), 1) == pytest.approx(50)
+    clock.advance(50)
+    limiter._prune(clock())
+    assert limiter._delay(clock(), 1) == 0
+
+
+def test_tokens_per_minute_waits_for_enough_to_expire(clock):
+    limiter = ModelRateLimiter(rpm=100, tpm=100, clock=clock)
+    limiter.acquire(60)
+    clock.advance(10)
+    limiter.acquire(30)
+    clock.advance(5)
+    # 50 more needs the first entry (60 tokens) gone: at t=60.
+    assert limiter._delay(clock(), 50) == pytest.approx(45)
+    # 5 more fits now.
+    assert limiter._delay(clock(), 5) == 0
+
+
+def test_oversized_request_runs_once_window_is_empty(clock):
+    limiter = ModelRateLimiter(rpm=100, tpm=100, clock=clock)
+    assert limiter._delay(clock(), 500) == 0
+    limiter.acquire(500)
+    clock.advance(1)
+    assert limiter._delay(clock(), 1) == pytest.approx(59)
+
+
+def test_settle_corrects_reserved_tokens(clock):
+    limiter = ModelRateLimiter(rpm=100, tpm=100, clock=clock)
+    entry = limiter.acquire(90)
+    assert limiter._delay(clock(), 20) > 0
+    limiter.settle(entry, 30)
+    assert limiter.stats()["tokens_in_window"] == 30
+    assert limiter._delay(clock(), 20) == 0
+
+
+def test_settle_after_expiry_leaves_window_untouched(clock):
+    limiter = ModelRateLimiter(rpm=100, tpm=100, clock=clock)
+    entry = limiter.acquire(90)
+    clock.advance(61)
+    limiter.acquire(10)
+    limiter.settle(entry, 40)
+    assert limiter.stats()["tokens_in_window"] == 10
+
+
+def test_defer_holds_every_caller(clock):
+    limiter = ModelRateLimiter(rpm=100, tpm=10**6, clock=clock)
+    limiter.defer(5)
+    assert limiter._delay(clock(), 1) == pytest.approx(5)
+    assert limiter.stats()["rate_limited"] == 1
+    clock.advance(5)
+    assert limiter._delay(clock(), 1) == 0
+
+
+def test_waiters_are_served_first_come_first_served(clock):
+    limiter = ModelRateLimiter(rpm=100, tpm=100, clock=clock)
+    limiter.acquire(90)
+    order = []
+
+    def request(name, tokens):
+        limiter.acquire(tokens)
+        order.append(name)
+
+    large = threading.Thread(target=request, args=("large", 50))
+    large.start()
+    wait_until(lambda: limiter.stats()["queue_depth"] == 1)
+    # Would fit right now, but must not overtake the large request.
+    small = threading.Thread(target=request, args=("small", 5))
+    small.start()
+    wait_until(lambda: limiter.stats()["queue_depth"] == 2)
+    time.sleep(0.05)
+    assert order == []
+
+    clock.advance(60)
+    wake(limiter)
+    large.join(timeout=2)
+    small.join(timeout=2)
+    assert order == ["large", "small"]
+    stats = limiter.stats()
+    assert stats["waits"] == 2
+    assert stats["max_wait_seconds"] == pytest.approx(60)
+
+
+class RateLimitError(Exception):
+    def __init__(self, status_code, retry_after=None):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(headers={"retry-after": retry_after} if retry_after else {})
+
+
+class FlakyLLM:
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def invoke(self, prompt, **kwargs):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return SimpleNamespace(content="ok", usage_metadata={"total_tokens": 12})
+
+
+def test_retries_429_honouring_retry_after():
+    limiter = ModelRateLimiter(rpm=100, tpm=10**6)
+    llm = RateLimitedLLM(FlakyLLM([RateLimitError(429, retry_after="0")]), "model", limiter=limiter)
+    assert llm.invoke("prompt").content == "ok"
+    stats = limiter.stats()
+    assert stats["rate_limited"] == 1
+    assert stats["retries"] == 1
+    assert stats["requests"] == 2
+    # The rejected attempt is settled to nothing, the successful one to
+    # the reported usage.
+    assert stats["tokens_in_window"] == 12
+
+
+def test_non_retryable_errors_raise_immediately():
+    limiter = ModelRateLimiter(rpm=100, tpm=10**6)
+    flaky = FlakyLLM([RateLimitError(400)])
+    llm = RateLimitedLLM(flaky, "model", limiter=limiter)
+    with pytest.raises(RateLimitError):
+        llm.invoke("prompt")
+    assert flaky.calls == 1
+    assert limiter.stats()["tokens_in_window"] == 0
@@ -0,0 +1,115 @@
+import time
+
+from agents.cache import RetrievalCache
+from agents.retriever import RetrieverAgent
+
+
+KEYWORDS = ["graph neural networks", "protein folding", "quantum error correction", "diffusion models"]
+
+
+def make_paper(title: str, abstract: str = "") -> dict:
+    return {"source": "arxiv", "title": title, "url": f"http://arxiv.org/abs/{abs(hash(title))}",
+            "published": "2024-01-01", "abstract": abstract or title}
+
+
+def make_agent(monkeypatch, wiki_delay: float = 0.3, arxiv_delay: float = 1.5) -> RetrieverAgent:
+    agent = RetrieverAgent(use_cache=False)
+
+    def query_pages(titles, skip_disambiguation=False):
+        time.sleep(wiki_delay)
+        return {
+            title: {"source": "wikipedia", "title": title.title(), "url": "", "content": f"About {title}."}
+            for title in titles
+        }
+
+    def stream_arxiv(search_query, max_results):
+        # The top hit matches the first keyword; the feed then takes the
+        # rest of the mocked latency to finish.
+        time.sleep(0.1)
+        yield make_paper("Graph neural networks for molecules")
+        time.sleep(arxiv_delay - 0.1)
+        yield make_paper("Protein folding with deep learning")
+        yield make_paper("Quantum error correction codes")
+        yield make_paper("Diffusion models for images")
+
+    monkeypatch.setattr(agent, "_query_wikipedia_pages", query_pages)
+    monkeypatch.setattr(agent, "_stream_arxiv", stream_arxiv)
+    return agent
+
+
+def test_first_keyword_yields_before_slowest_source(monkeypatch):
+    agent = make_agent(monkeypatch)
+
+    start = time.monotonic()
+    arrivals = [(index, time.monotonic() - start, result) for index, result in agent.retrieve_stream(KEYWORDS)]
+
+    first_index, first_time, first_result = arrivals[0]
+    assert first_index == 0
+    assert first_time < 1.0
+    assert first_result["wikipedia"]["title"] == "Graph Neural Networks"
+    assert first_result["arxiv_papers"][0]["title"] == "Graph neural networks for molecules"
+
+    assert sorted(index for index, _, _ in arrivals) == list(range(len(KEYWORDS)))
+    assert arrivals[-1][1] >= 1.4
+
+
+def test_batch_attribution_matches_streamed_order(monkeypatch):
+    agent = make_agent(monkeypatch, wiki_delay=0, arxiv_delay=0.1)
+    papers = agent._fetch_arxiv_batch(KEYWORDS)
+    assert [p[0]["title"] for p in papers] == [
+        "Graph neural networks for molecules",
+        "Protein folding with deep learning",
+        "Quantum error correction codes",
+        "Diffusion models for images",
+    ]
+
+
+def test_partial_match_waits_for_better_paper(monkeypatch):
+    agent = RetrieverAgent(use_cache=False)
+
+    def stream_arxiv(search_query, max_results):
+        yield make_paper("Neural networks survey")
+        yield make_paper("Graph neural networks explained")
+
+    monkeypatch.setattr(agent, "_stream_arxiv", stream_arxiv)
+    # A half match seen first must not settle the keyword early.
+    assert agent._fetch_arxiv_batch(["graph neural networks"])[0][0]["title"] == "Graph neural networks explained"
+
+
+def test_failed_batched_source_settles_empty(monkeypatch):
+    agent = make_agent(monkeypatch, wiki_delay=0)
+
+    def broken(search_query, max_results):
+        raise ConnectionError("feed unavailable")
+        yield
+
+    monkeypatch.setattr(agent, "_stream_arxiv", broken)
+    monkeypatch.setattr(agent, "_fetch_arxiv", lambda keyword, max_results=1: [])
+    results = dict(agent.retrieve_stream(KEYWORDS))
+    assert all(results[i]["arxiv_papers"] == [] for i in range(len(KEYWORDS)))
+    assert all(results[i]["wikipedia"]["title"] for i in range(len(KEYWORDS)))
+
+
+def test_keywords_without_full_match_fall_back_uncached(monkeypatch, tmp_path):
+    agent = RetrieverAgent(cache=RetrievalCache(tmp_path / "retrieval.sqlite3"))
+
+    def stream_arxiv(search_query, max_results):
+        yield make_paper("Protein folding with deep learning")
+        yield make_paper("Graph methods overview")
+
+    own_queries = []
+
+    def fetch_arxiv(keyword, max_results=1):
+        own_queries.append(keyword)
+        return [make_paper("Graph neural networks: a review")]
+
+    monkeypatch.setattr(agent, "_stream_arxiv", stream_arxiv)
+    monkeypatch.setattr(agent, "_fetch_arxiv", fetch_arxiv)
+    papers = agent._fetch_arxiv_batch(["graph neural networks", "protein folding"])
+
+    assert papers[0][0]["title"] == "Graph neural networks: a review"
+    assert papers[1][0]["title"] == "Protein folding with deep learning"
+    assert own_queries == ["graph neural networks"]
+    batch_params = {"max_results": 1, "mode": "batch"}
+    assert agent.cache.lookup("arxiv", "graph neural networks", batch_params) is None
+    assert agent.cache.lookup("arxiv", "protein folding", batch_params) is not None
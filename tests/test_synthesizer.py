@@ -0,0 +1,116 @@
+from types import SimpleNamespace
+
+import pytest
+
+from agents.synthesizer import REPORT_SECTIONS, SynthesizerAgent
+from agents.tokens import estimate_tokens
+
+
+class FakeLLM:
+    def __init__(self, tpm: int):
+        self.limiter = SimpleNamespace(tpm=tpm)
+        self.invoked = []
+        self.streamed = []
+
+    def invoke(self, prompt, output_tokens=None, **kwargs):
+        self.invoked.append(prompt)
+        return SimpleNamespace(content="A sentence. Another sentence.")
+
+    def stream(self, prompt, output_tokens=None, **kwargs):
+        self.streamed.append(prompt)
+        yield SimpleNamespace(content="Introduction\n\nReport text.")
+
+
+def make_summaries(areas: int = 6, points: int = 12, sources: int = 1) -> list:
+    return [
+        {
+            "keyword": f"area {a}",
+            "summaries": [
+                {
+                    "source_type": "arxiv",
+                    "title": f"Paper {a}.{s}",
+                    "url": "",
+                    "key_points": [
+                        f"Finding {p} of paper {s} about area {a} and attention in transformer models."
+                        for p in range(points)
+                    ]
+                }
+                for s in range(sources)
+            ]
+        }
+        for a in range(areas)
+    ]
+
+
+@pytest.fixture
+def synthesizer():
+    return SynthesizerAgent(use_cache=False)
+
+
+def test_sections_fall_back_to_single_pass_when_over_tpm(synthesizer):
+    synthesizer.llm = FakeLLM(tpm=8000)
+    stats = {}
+    synthesizer.synthesize(make_summaries(), "attention", mode="sections", stats=stats)
+    assert stats["mode"] == "single"
+    assert len(synthesizer.llm.streamed) == 1
+    assert synthesizer.llm.invoked == []
+
+
+def test_sections_run_concurrently_within_tpm(synthesizer):
+    synthesizer.llm = FakeLLM(tpm=250000)
+    stats = {}
+    synthesis = synthesizer.synthesize(make_summaries(), "attention", mode="sections", stats=stats)
+    assert stats["mode"] == "sections"
+    # Five sections plus the stitching call, no single-pass stream.
+    assert len(synthesizer.llm.invoked) == len(REPORT_SECTIONS) + 1
+    assert synthesizer.llm.streamed == []
+    assert synthesis["report_text"].startswith("Introduction")
+
+
+def test_sections_trim_shared_context_to_fit(synthesizer):
+    summaries = make_summaries()
+    full = estimate_tokens(synthesizer._format_summaries_for_prompt(summaries))
+    # Room for roughly three quarters of the context in each section call.
+    synthesizer.llm = FakeLLM(tpm=len(REPORT_SECTIONS) * (full * 3 // 4 + 1400) + 1200)
+    synthesizer.synthesize(summaries, "attention", mode="sections")
+    section_prompts = synthesizer.llm.invoked[:len(REPORT_SECTIONS)]
+    assert len(section_prompts) == len(REPORT_SECTIONS)
+    section_tokens = sum(estimate_tokens(prompt) + 800 for prompt in section_prompts)
+    assert section_tokens <= synthesizer.llm.limiter.tpm
+
+
+def test_large_jobs_go_hierarchical_without_losing_points(synthesizer):
+    synthesizer.llm = FakeLLM(tpm=250000)
+    summaries = make_summaries(areas=10, points=6, sources=5)
+    summaries[0]["summaries"][0]["key_points"].append("No content available to summarize")
+    stats = {}
+    synthesizer.synthesize(summaries, "attention", stats=stats)
+    assert stats["tokens_before"] > synthesizer.prompt_token_budget
+    # Only the placeholder is dropped; the rest is condensed by partial calls.
+    assert stats["points_before"] - stats["points_after"] == 1
+    assert synthesizer.llm.invoked
+    assert estimate_tokens(synthesizer.llm.streamed[0]) <= synthesizer.prompt_token_budget
+
+
+def test_compression_trims_to_its_own_budget_first(synthesizer):
+    synthesizer.llm = FakeLLM(tpm=250000)
+    stats = {}
+    synthesizer.synthesize(make_summaries(areas=10, points=20, sources=5), "attention", stats=stats)
+    assert stats["tokens_before"] > synthesizer.compression_token_budget
+    assert synthesizer.prompt_token_budget < stats["tokens_after"] <= synthesizer.compression_token_budget
+    assert synthesizer.llm.invoked
+
+
+def test_failed_stream_reports_error_in_stats(synthesizer):
+    class DroppedStreamLLM(FakeLLM):
+        def stream(self, prompt, output_tokens=None, **kwargs):
+            yield SimpleNamespace(content="Introduction")
+            raise RuntimeError("connection reset")
+
+    synthesizer.llm = DroppedStreamLLM(tpm=250000)
+    chunks = []
+    stats = {}
+    synthesis = synthesizer.synthesize(make_summaries(), "attention", on_chunk=chunks.append, stats=stats)
+    assert chunks == ["Introduction"]
+    assert stats["error"] == "connection reset"
+    assert synthesis["report_text"] != "".join(chunks)